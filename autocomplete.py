@@ -0,0 +1,170 @@
+"""
+In-memory prefix index over normalized names for search-as-you-type
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """Sorted list of every name_key, answering prefix lookups with bisect.
+
+    The list is built in a background thread on first use; until it is
+    ready lookups return no names rather than wait on storage. The write
+    paths of this worker keep it current. Names added by other workers show
+    up after the next refresh, which runs once the list is older than
+    ``refresh_seconds`` and reads only the rows with an id above the
+    highest one seen. Names deleted by other workers, and rows whose ids
+    were committed out of order, only go away or show up after a full
+    reload every ``reload_seconds``. Refreshes run in a background thread
+    while the current list keeps serving.
+    """
+
+    def __init__(self, load, refresh_seconds=60.0, reload_seconds=3600.0):
+        self._load = load  # load(after_id) returns (id, name_key) pairs with id > after_id
+        self.refresh_seconds = refresh_seconds
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._keys = None
+        self._last_id = 0
+        self._refreshed_at = None
+        self._reloaded_at = None
+        self._journal = None  # writes seen while a refresh is running
+        self._refreshing = False
+        self.lookups = 0
+        self.refreshes = 0
+        self.reloads = 0
+
+    def complete(self, prefix, limit):
+        """Return up to limit name_keys starting with prefix, in order"""
+        if self._stale():
+            self.refresh_in_background()
+
+        with self._lock:
+            self.lookups += 1
+            if self._keys is None:
+                return []
+            start = bisect.bisect_left(self._keys, prefix)
+            keys = self._keys[start:start + limit]
+        return [key for key in keys if key.startswith(prefix)]
+
+    def add(self, name_key):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((True, name_key))
+            if self._keys is not None:
+                self._insert(self._keys, name_key)
+
+    def discard(self, name_key):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((False, name_key))
+            if self._keys is not None:
+                self._remove(self._keys, name_key)
+
+    def invalidate(self):
+        """Refresh on the next lookup, e.g. after a bulk import"""
+        with self._lock:
+            self._refreshed_at = None
+
+    def refresh(self):
+        """Read the rows added since the last refresh, or every row when
+        the list is not built yet or a full reload is due"""
+        with self._load_lock:
+            with self._lock:
+                if not self._stale():
+                    # Another thread refreshed while this one waited
+                    return
+                full = self._keys is None or self._reload_due()
+                after_id = 0 if full else self._last_id
+                self._journal = []
+            try:
+                last_id = after_id
+                names = set()
+                for person_id, name_key in self._load(after_id):
+                    names.add(name_key)
+                    last_id = max(last_id, person_id)
+            except Exception:
+                with self._lock:
+                    self._journal = None
+                    if self._keys is not None:
+                        # Keep serving the current list and retry after refresh_seconds
+                        self._refreshed_at = time.monotonic()
+                raise
+
+            keys = sorted(names) if full else None
+            with self._lock:
+                if keys is None:
+                    keys = self._keys
+                    for name_key in names:
+                        self._insert(keys, name_key)
+                # Replay writes that may have missed the snapshot
+                for added, name_key in self._journal:
+                    if added:
+                        self._insert(keys, name_key)
+                    else:
+                        self._remove(keys, name_key)
+                self._journal = None
+                self._keys = keys
+                self._last_id = last_id
+                self._refreshed_at = time.monotonic()
+                self.refreshes += 1
+                if full:
+                    self._reloaded_at = self._refreshed_at
+                    self.reloads += 1
+        if full:
+            logger.info(f"Loaded {len(keys)} names into the autocomplete index")
+
+    def refresh_in_background(self):
+        """Start a refresh in a background thread unless one is running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Autocomplete index refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='autocomplete-refresh', daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'names': len(self._keys) if self._keys is not None else 0,
+                'ready': self._keys is not None,
+                'age_seconds': time.monotonic() - self._refreshed_at if self._refreshed_at is not None else None,
+                'lookups': self.lookups,
+                'refreshes': self.refreshes,
+                'reloads': self.reloads,
+            }
+
+    def _stale(self):
+        return (self._keys is None or self._refreshed_at is None
+                or time.monotonic() - self._refreshed_at > self.refresh_seconds
+                or self._reload_due())
+
+    def _reload_due(self):
+        return self._reloaded_at is None or time.monotonic() - self._reloaded_at > self.reload_seconds
+
+    @staticmethod
+    def _insert(keys, name_key):
+        position = bisect.bisect_left(keys, name_key)
+        if position == len(keys) or keys[position] != name_key:
+            keys.insert(position, name_key)
+
+    @staticmethod
+    def _remove(keys, name_key):
+        position = bisect.bisect_left(keys, name_key)
+        if position < len(keys) and keys[position] == name_key:
+            del keys[position]
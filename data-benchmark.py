@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Data Function Benchmark for Phonebook App
+Measures find_persons, insert_person, update_person, delete_person and
+validate_input against a local storage backend across dataset sizes and
+keyword selectivities, and optionally fails when a run regresses against
+a baseline
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import dataset
+from storage import normalize_name
+
+# Keywords from broad to absent; 'rare' is replaced by a name from the dataset
+KEYWORDS = {
+    'broad': 'an',
+    'common': 'mehmet',
+    'rare': None,
+    'miss': 'qxzvw',
+}
+
+ALLOCATION_SAMPLES = 50
+
+
+def parse_sizes(text):
+    return [int(size) for size in text.split(',')]
+
+
+def measure(operation, iterations, offset=0):
+    """Time iterations calls of operation(i) and sample allocations on further calls.
+
+    Allocation is the peak traced memory during one call, measured on
+    separate calls because tracing slows everything down.
+    """
+    latencies = []
+    for i in range(offset, offset + iterations):
+        start = time.perf_counter_ns()
+        operation(i)
+        latencies.append(time.perf_counter_ns() - start)
+
+    allocations = []
+    tracemalloc.start()
+    try:
+        for i in range(offset + iterations, offset + iterations + ALLOCATION_SAMPLES):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            operation(i)
+            allocations.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    total_s = sum(latencies) / 1e9
+    return {
+        'iterations': iterations,
+        'ops_per_sec': iterations / total_s if total_s else 0.0,
+        'mean_us': statistics.fmean(latencies) / 1000,
+        'p50_us': quantiles[49] / 1000,
+        'p95_us': quantiles[94] / 1000,
+        'p99_us': quantiles[98] / 1000,
+        'max_us': max(latencies) / 1000,
+        'alloc_bytes_per_call': statistics.median(allocations),
+    }
+
+
+def benchmark_size(phonebook_app, backend, size, seed, iterations, search_cache, workdir):
+    """Load a dataset of size contacts and benchmark every data function on it"""
+    config = {
+        'SSM_LOCAL_PARAMETERS': os.path.join(workdir, 'parameters.json'),
+        'STORAGE_BACKEND': backend,
+        'SQLITE_PATH': os.path.join(workdir, f'phonebook-{size}.db'),
+        'SEARCH_CACHE_SIZE': 1024 if search_cache else 0,
+        'SLOW_QUERY_THRESHOLD_MS': None,
+    }
+    app = phonebook_app.create_app(config)
+    results = {}
+    with app.app_context():
+        storage = phonebook_app.phonebook_state('storage')
+        storage.init_schema()
+        load = dataset.load_dataset(storage, size, seed=seed)
+        print(f"  loaded {load['inserted']} contacts in {load['seconds']:.1f}s")
+
+        keywords = dict(KEYWORDS)
+        keywords['rare'] = normalize_name(next(dataset.generate_contacts(size, seed))[0])
+
+        results['validate_input[valid]'] = measure(
+            lambda i: phonebook_app.validate_input('Ayşe Yılmaz', '05321234567'), iterations)
+        results['validate_input[invalid]'] = measure(
+            lambda i: phonebook_app.validate_input('12345', '12ab'), iterations)
+
+        for selectivity, keyword in keywords.items():
+            results[f'find_persons[{selectivity}]'] = measure(
+                lambda i, keyword=keyword: phonebook_app.find_persons(keyword), iterations)
+
+        # Writes use fresh names and are undone by delete, so the dataset
+        # size stays the same for the next case
+        def name(i):
+            return f'bench contact {i:07d}'
+
+        results['insert_person'] = measure(lambda i: phonebook_app.insert_person(name(i), '05321234567'), iterations)
+        results['update_person'] = measure(lambda i: phonebook_app.update_person(name(i), '05329876543'), iterations)
+        results['delete_person'] = measure(lambda i: phonebook_app.delete_person(name(i)), iterations)
+    return results
+
+
+def run_benchmark(backend, sizes, seed, iterations, search_cache):
+    """Return {'<case>@<size>': stats} for every case and dataset size"""
+    phonebook_app = importlib.import_module('phonebook-app-secure')
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # Local stand-in for SSM; the local backends never use it
+        with open(os.path.join(workdir, 'parameters.json'), 'w', encoding='utf-8') as f:
+            json.dump({'/ismail/phonebook/username': 'bench', '/ismail/phonebook/password': 'bench'}, f)
+
+        for size in sizes:
+            print(f"📦 {backend} backend, {size} contacts")
+            for case, stats in benchmark_size(phonebook_app, backend, size, seed, iterations, search_cache, workdir).items():
+                results[f'{case}@{size}'] = stats
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """Return a list of cases whose median latency or allocations regressed past the threshold"""
+    regressions = []
+    for case, stats in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        for metric, unit in (('p50_us', 'µs'), ('alloc_bytes_per_call', 'B')):
+            old, new = before[metric], stats[metric]
+            if old > 0 and (new - old) / old > max_regression:
+                regressions.append(f"{case} {metric}: {old:.1f} {unit} -> {new:.1f} {unit}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Phonebook App data functions')
+    parser.add_argument('--backend', choices=('memory', 'sqlite'), default='memory',
+                        help='Local storage backend to benchmark (default: memory)')
+    parser.add_argument('--sizes', type=parse_sizes, default=[10000, 100000],
+                        help='Comma-separated dataset sizes (default: 10000,100000)')
+    parser.add_argument('--seed', type=int, default=0, help='Dataset seed (default: 0)')
+    parser.add_argument('--iterations', type=int, default=500, help='Timed calls per case (default: 500)')
+    parser.add_argument('--search-cache', action='store_true',
+                        help='Keep the search cache enabled (default: every search reaches the backend)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed increase of any median latency or allocation as a fraction (default: 0.2)')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.backend, args.sizes, args.seed, args.iterations, args.search_cache)
+
+    print("🚀 Data function benchmark")
+    print("-" * 78)
+    print(f"  {'case':<34} {'ops/s':>10} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'alloc B':>9}")
+    for case, stats in results.items():
+        print(f"  {case:<34} {stats['ops_per_sec']:>10.0f} {stats['p50_us']:>9.1f} {stats['p95_us']:>9.1f} "
+              f"{stats['p99_us']:>9.1f} {stats['alloc_bytes_per_call']:>9.0f}")
+    print("-" * 78)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ Data functions regressed by more than {args.max_regression:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("✅ No data function regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
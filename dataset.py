@@ -0,0 +1,183 @@
+"""
+Deterministic synthetic phonebooks for scale testing
+
+generate_contacts() yields the same contacts for the same size and seed on
+every machine. Given names and surnames follow a Zipf-like popularity
+curve, so datasets of every size are dominated by common names such as
+"Mehmet Yılmaz" that share trigrams with many others; second given names
+keep the repeats of a popular pair unique. A small share of extra
+rows repeat an earlier contact with different letter case; they collide
+on name_key and exercise duplicate handling.
+
+load_dataset() bulk loads a dataset into any storage backend.
+"""
+
+import itertools
+import logging
+import random
+import time
+from collections import deque
+
+from storage import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Ordered from most to least common; Turkish names dominate as they do in
+# the production phonebook, with other non-ASCII and ASCII names mixed in
+GIVEN_NAMES = [
+    'Mehmet', 'Mustafa', 'Ahmet', 'Ali', 'Hüseyin', 'Hasan', 'İbrahim', 'İsmail', 'Osman', 'Yusuf',
+    'Fatma', 'Ayşe', 'Emine', 'Hatice', 'Zeynep', 'Elif', 'Meryem', 'Şerife', 'Zehra', 'Sultan',
+    'Murat', 'Ömer', 'Ramazan', 'Halil', 'Süleyman', 'Abdullah', 'Mahmut', 'Recep', 'Salih', 'Kemal',
+    'Hanife', 'Merve', 'Havva', 'Zeliha', 'Esra', 'Fadime', 'Özlem', 'Hacer', 'Melek', 'Yasemin',
+    'Emre', 'Burak', 'Can', 'Cem', 'Deniz', 'Eren', 'Gökhan', 'Hakan', 'Kadir', 'Onur',
+    'Çağla', 'Gülşen', 'Şule', 'Büşra', 'Tuğba', 'Gizem', 'Ebru', 'Derya', 'Sevgi', 'Dilek',
+    'Şükrü', 'Ümit', 'Özgür', 'Uğur', 'Çağrı', 'Doğan', 'Ilgın', 'Işıl', 'Gökçe', 'Nurşen',
+    'John', 'Michael', 'David', 'James', 'Robert', 'Mary', 'Jennifer', 'Linda', 'Sarah', 'Emily',
+    'José', 'María', 'Lucía', 'Sofía', 'Andrés', 'Zoë', 'Chloé', 'François', 'Hélène', 'Jérôme',
+    'Jürgen', 'Björn', 'Søren', 'Åsa', 'Łukasz', 'Małgorzata', 'Jiří', 'Dvořák', 'Ionuț', 'Ștefan',
+    'Nikolaos', 'Dimitra', 'Olga', 'Sergei', 'Natalia', 'Mohammed', 'Fatima', 'Aisha', 'Omar', 'Layla',
+    'Nguyễn', 'Trần', 'Hiroshi', 'Yuki', 'Priya', 'Arjun', 'Ngozi', 'Chidi', 'Aroha', 'Mateus',
+]
+
+SURNAMES = [
+    'Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın', 'Özdemir',
+    'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek',
+    'Polat', 'Özcan', 'Korkmaz', 'Çakır', 'Erdoğan', 'Yavuz', 'Can', 'Acar', 'Şen', 'Aktaş',
+    'Güler', 'Yalçın', 'Güneş', 'Bozkurt', 'Bulut', 'Keskin', 'Ünal', 'Turan', 'Gül', 'Özer',
+    'Işık', 'Kaplan', 'Avcı', 'Sarı', 'Tekin', 'Taş', 'Köse', 'Yüksel', 'Ateş', 'Aksoy',
+    'Eren', 'Uçar', 'Çiftçi', 'Güven', 'Gündoğdu', 'Karataş', 'Özgür', 'Sönmez', 'Tunç', 'Akgül',
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson', 'Taylor', 'Clark',
+    'García', 'Rodríguez', 'Martínez', 'Hernández', 'López', 'González', 'Pérez', 'Sánchez', 'Gómez', 'Díaz',
+    'Müller', 'Schröder', 'Köhler', 'Weiß', 'Jäger', 'Lefèvre', 'Dubois', 'Bérubé', 'Østergaard', 'Åberg',
+    'Nowak', 'Wójcik', 'Kowalczyk', 'Dvořáková', 'Novák', 'Popescu', 'Țurcanu', 'Papadopoulos', 'Ivanov', 'Petrović',
+    'Al-Farsi', 'El-Amin', 'Haddad', 'Nguyễn', 'Phạm', 'Tanaka', 'Suzuki', 'Sato', 'Patel', 'Sharma',
+    "O'Brien", "O'Connor", 'MacDonald', 'Van der Berg', 'De la Cruz', 'Okafor', 'Adeyemi', 'Mensah', 'Silva', 'Santos',
+]
+
+# Second given names, used once every given name and surname pair is taken
+MIDDLE_NAMES = [
+    'Nur', 'Can', 'Rıza', 'Kemal', 'Naz', 'Su', 'Gül', 'Ece', 'Efe', 'Tuna',
+    'Deniz', 'Ela', 'Arda', 'Kaan', 'Ada', 'Ayşegül', 'Şeyma', 'Çınar', 'Ömür', 'Aylin',
+    'Marie', 'Anne', 'Lee', 'Jean', 'Luis', 'Ana', 'Karl', 'Jan', 'Inés', 'Noël',
+]
+
+ZIPF_EXPONENT = 1.1
+
+CASE_VARIANTS = (str.upper, str.lower, str.swapcase)
+
+
+def _popular_pairs():
+    """Every (given name, surname) pair and the cumulative weights to draw them by"""
+    def weight(rank):
+        return 1.0 / (rank + 1) ** ZIPF_EXPONENT
+
+    pairs = [(given, surname) for given in range(len(GIVEN_NAMES)) for surname in range(len(SURNAMES))]
+    return pairs, list(itertools.accumulate(weight(given) * weight(surname) for given, surname in pairs))
+
+
+def _middle_names(generation):
+    """Map generation 1, 2, ... to a distinct sequence of middle names.
+
+    Bijective base-len(MIDDLE_NAMES) numbering, so capacity is unbounded
+    and generation 0 has no middle name at all.
+    """
+    names = []
+    while generation > 0:
+        generation -= 1
+        generation, index = divmod(generation, len(MIDDLE_NAMES))
+        names.append(MIDDLE_NAMES[index])
+    return names[::-1]
+
+
+def _phone_number(rng):
+    kind = rng.random()
+    if kind < 0.75:
+        # Turkish mobile
+        return f"05{rng.choice('0345')}{rng.randrange(10**8):08d}"
+    if kind < 0.9:
+        # Istanbul, Ankara and Izmir landlines
+        return f"0{rng.choice(('212', '216', '312', '232'))}{rng.randrange(10**7):07d}"
+    # North American numbers with country code
+    return f"1{rng.randrange(200, 1000)}{rng.randrange(10**7):07d}"
+
+
+def generate_contacts(size, seed=0, case_duplicate_rate=0.01):
+    """Yield (name, number) for ``size`` distinct contacts plus case-only duplicates.
+
+    Output depends only on the arguments. Each contact draws its given
+    name and surname pair by popularity, so ids do not correlate with it;
+    a pair drawn again gets the next sequence of middle names. After each
+    contact, with
+    probability ``case_duplicate_rate``, one of the last few hundred
+    contacts is repeated with different letter case and a new number.
+    """
+    rng = random.Random(seed)
+    pairs, cum_weights = _popular_pairs()
+    generations = [0] * len(pairs)
+    recent = deque(maxlen=256)
+
+    for _ in range(size):
+        pair = rng.choices(range(len(pairs)), cum_weights=cum_weights)[0]
+        generation = generations[pair]
+        generations[pair] += 1
+        given, surname = pairs[pair]
+        name = ' '.join([GIVEN_NAMES[given], *_middle_names(generation), SURNAMES[surname]])
+        yield name, _phone_number(rng)
+        recent.append(name)
+
+        if case_duplicate_rate and rng.random() < case_duplicate_rate:
+            original = rng.choice(recent)
+            # Dotless ı does not survive upper() then lower(), so only keep
+            # variants that still normalize to the original key
+            variants = [variant(original) for variant in CASE_VARIANTS]
+            variants = [variant for variant in variants
+                        if variant != original and normalize_name(variant) == normalize_name(original)]
+            if variants:
+                yield rng.choice(variants), _phone_number(rng)
+
+
+def load_dataset(storage, size, seed=0, batch_size=10000, case_duplicate_rate=0.01):
+    """Bulk load a generated dataset into storage.
+
+    Rows are written through Storage.bulk_save in batches of distinct keys.
+    A row whose key is already in the current batch is deferred to the next
+    one, so case-only duplicates reach the backend and are rejected there.
+    Returns a report with inserted and duplicate counts and the load rate.
+    """
+    report = {'size': size, 'seed': seed, 'inserted': 0, 'duplicates': 0}
+    start = time.perf_counter()
+
+    def flush(batch):
+        inserted, _, duplicates = storage.bulk_save(batch)
+        report['inserted'] += inserted
+        report['duplicates'] += len(duplicates)
+
+    def next_batch(pending):
+        """Start a batch from pending rows; rows repeating a key stay pending"""
+        batch, keys, remaining = [], set(), []
+        for row in pending:
+            (remaining if row[0] in keys else batch).append(row)
+            keys.add(row[0])
+        return batch, keys, remaining
+
+    batch, keys, deferred = [], set(), []
+    for name, number in generate_contacts(size, seed, case_duplicate_rate):
+        name_key = normalize_name(name)
+        if name_key in keys:
+            deferred.append((name_key, number))
+            continue
+        batch.append((name_key, number))
+        keys.add(name_key)
+
+        if len(batch) >= batch_size:
+            flush(batch)
+            logger.info(f"Loaded {report['inserted']} of {size} contacts")
+            batch, keys, deferred = next_batch(deferred)
+
+    while batch:
+        flush(batch)
+        batch, keys, deferred = next_batch(deferred)
+
+    report['seconds'] = time.perf_counter() - start
+    report['rows_per_second'] = (report['inserted'] + report['duplicates']) / report['seconds'] if report['seconds'] else 0.0
+    return report
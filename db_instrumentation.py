@@ -0,0 +1,126 @@
+"""
+Per-request database round-trip accounting and slow query logging
+"""
+
+import logging
+import re
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, has_request_context
+from pymysql.cursors import Cursor, SSCursor
+
+slow_query_logger = logging.getLogger('phonebook.slow_query')
+
+DEFAULT_SLOW_QUERY_THRESHOLD_MS = 100.0
+
+
+class RequestDBStats:
+    """Round trips and time spent in the database while handling one request"""
+
+    __slots__ = ('round_trips', 'seconds')
+
+    def __init__(self):
+        self.round_trips = 0
+        self.seconds = 0.0
+
+
+def request_db_stats():
+    """Return the stats of the current request, or None outside a request"""
+    if not has_request_context():
+        return None
+    stats = g.get('db_stats')
+    if stats is None:
+        stats = g.db_stats = RequestDBStats()
+    return stats
+
+
+def redact(statement):
+    """Collapse whitespace and drop everything but the statement shape"""
+    return re.sub(r'\s+', ' ', statement).strip()
+
+
+def record_round_trip(statement, param_count, elapsed):
+    """Account one round trip and log it if it exceeded the slow query threshold"""
+    stats = request_db_stats()
+    if stats is not None:
+        stats.round_trips += 1
+        stats.seconds += elapsed
+
+    threshold = DEFAULT_SLOW_QUERY_THRESHOLD_MS
+    if has_app_context():
+        threshold = current_app.config.get('SLOW_QUERY_THRESHOLD_MS', threshold)
+    if threshold is not None and elapsed * 1000 >= threshold:
+        # Only the parameterized statement is logged; values never are
+        slow_query_logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms, {param_count} params redacted): {redact(statement)}"
+        )
+
+
+class InstrumentedCursorMixin:
+    """Time every statement sent to the server.
+
+    executemany() may send one multi-row INSERT or several statements;
+    each is counted as a round trip but logged with the original
+    parameterized statement so literal values never reach the slow log.
+    """
+
+    _template = None
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            if self._template is not None:
+                statement, param_count = self._template
+            else:
+                statement = query
+                param_count = 0 if args is None else len(args) if isinstance(args, (list, tuple, dict)) else 1
+            record_round_trip(statement, param_count, time.perf_counter() - start)
+
+    def executemany(self, query, args):
+        rows = list(args)
+        self._template = (query, sum(len(row) for row in rows))
+        try:
+            return super().executemany(query, rows)
+        finally:
+            self._template = None
+
+
+class InstrumentedCursor(InstrumentedCursorMixin, Cursor):
+    """Buffered cursor with round-trip accounting"""
+
+
+class InstrumentedSSCursor(InstrumentedCursorMixin, SSCursor):
+    """Unbuffered server-side cursor with round-trip accounting"""
+
+
+@contextmanager
+def transaction(connection):
+    """Run a block in a transaction, committing on success and rolling back on error.
+
+    BEGIN, COMMIT and ROLLBACK are accounted as round trips.
+    """
+    start = time.perf_counter()
+    connection.begin()
+    record_round_trip('BEGIN', 0, time.perf_counter() - start)
+    try:
+        yield
+    except BaseException:
+        start = time.perf_counter()
+        connection.rollback()
+        record_round_trip('ROLLBACK', 0, time.perf_counter() - start)
+        raise
+    start = time.perf_counter()
+    connection.commit()
+    record_round_trip('COMMIT', 0, time.perf_counter() - start)
+
+
+def server_timing_header(stats, total_seconds):
+    """Format the Server-Timing header for a finished request"""
+    parts = []
+    if stats is not None:
+        parts.append(f'db;dur={stats.seconds * 1000:.2f};desc="{stats.round_trips} round trips"')
+    parts.append(f'total;dur={total_seconds * 1000:.2f}')
+    return ', '.join(parts)
@@ -0,0 +1,249 @@
+"""
+Thread-safe database connection pool for the Phonebook App
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections.
+
+    Connections are opened lazily through ``connect`` up to ``max_size``.
+    The first checkout warms the pool with ``min_size`` connections.
+    Connections older than ``max_lifetime`` seconds or idle for longer than
+    ``max_idle`` seconds are closed and replaced on checkout.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0,
+                 max_lifetime=3600.0, max_idle=300.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()   # (connection, created_at, last_used)
+        self._created = {}     # id(connection) -> created_at
+        self._size = 0
+        self._warmed = False
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        """Borrow a connection, waiting up to ``timeout`` seconds for one to free up"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if not self._warmed:
+            self._warm()
+
+        while True:
+            stale = None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No connection available after {timeout}s")
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    connection, created_at, last_used = self._idle.pop()
+                    now = time.monotonic()
+                    if (now - created_at > self.max_lifetime
+                            or now - last_used > self.max_idle):
+                        stale = connection
+                        self._forget(connection)
+                    else:
+                        return connection
+                else:
+                    self._size += 1
+
+            if stale is not None:
+                self._close(stale)
+                continue
+
+            try:
+                return self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+    def release(self, connection):
+        """Return a borrowed connection; broken connections are discarded"""
+        if connection is None:
+            return
+
+        with self._cond:
+            if id(connection) not in self._created:
+                return
+            if self._closed or not getattr(connection, 'open', True):
+                self._forget(connection)
+                discard = True
+            else:
+                self._idle.append((connection, self._created[id(connection)], time.monotonic()))
+                discard = False
+            self._cond.notify()
+
+        if discard:
+            self._close(connection)
+
+    def discard(self, connection):
+        """Drop a borrowed connection instead of returning it to the pool"""
+        if connection is None:
+            return
+
+        with self._cond:
+            if id(connection) not in self._created:
+                return
+            self._forget(connection)
+            self._cond.notify()
+        self._close(connection)
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [entry[0] for entry in self._idle]
+            self._idle.clear()
+            for connection in idle:
+                self._forget(connection)
+            self._cond.notify_all()
+
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Return a snapshot of pool occupancy"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            }
+
+    def _warm(self):
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+
+        for _ in range(missing):
+            try:
+                connection = self._open()
+            except Exception as e:
+                logger.error(f"Failed to warm connection pool: {e}")
+                with self._cond:
+                    self._size -= 1
+                continue
+            self.release(connection)
+
+    def _open(self):
+        connection = self._connect()
+        with self._cond:
+            self._created[id(connection)] = time.monotonic()
+        return connection
+
+    def _forget(self, connection):
+        # Caller holds the lock
+        self._created.pop(id(connection), None)
+        self._size -= 1
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+
+
+class ReplicasUnavailable(Exception):
+    """Raised when no healthy read replica can hand out a connection"""
+
+
+class ReplicaSet:
+    """Round-robin load balancing over the connection pools of read replicas.
+
+    A replica whose checkout or query fails is ejected for
+    ``eject_seconds``; afterwards it receives traffic again and stays in
+    rotation once a request on it succeeds. ``pools`` maps a replica name,
+    such as its host, to its ConnectionPool.
+    """
+
+    def __init__(self, pools, eject_seconds=30.0):
+        if not pools:
+            raise ValueError("At least one replica pool is required")
+        self.pools = dict(pools)
+        self.eject_seconds = eject_seconds
+
+        self._lock = threading.Lock()
+        self._names = list(self.pools)
+        self._next = 0
+        self._ejected_until = {}  # name -> monotonic time
+
+    def acquire(self, timeout=None):
+        """Return (name, connection) from the next healthy replica"""
+        for name in self._rotation():
+            try:
+                return name, self.pools[name].acquire(timeout)
+            except PoolTimeout:
+                # Busy rather than broken; try the next replica
+                continue
+            except Exception as e:
+                self.eject(name, e)
+        raise ReplicasUnavailable("No healthy read replica available")
+
+    def release(self, name, connection):
+        """Return a connection after a successful query"""
+        self.pools[name].release(connection)
+
+    def fail(self, name, connection, error):
+        """Discard the connection of a failed query and eject its replica"""
+        self.pools[name].discard(connection)
+        self.eject(name, error)
+
+    def eject(self, name, error=None):
+        with self._lock:
+            self._ejected_until[name] = time.monotonic() + self.eject_seconds
+        logger.warning(f"Ejecting read replica {name} for {self.eject_seconds:g}s: {error}")
+
+    def healthy(self, name):
+        with self._lock:
+            return self._ejected_until.get(name, 0.0) <= time.monotonic()
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+    def stats(self):
+        """Return pool occupancy and health of every replica"""
+        return {name: dict(pool.stats(), healthy=self.healthy(name)) for name, pool in self.pools.items()}
+
+    def _rotation(self):
+        """Healthy replicas in round-robin order starting after the last one used"""
+        now = time.monotonic()
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self._names)
+            ordered = self._names[start:] + self._names[:start]
+            return [name for name in ordered if self._ejected_until.get(name, 0.0) <= now]
@@ -0,0 +1,70 @@
+"""
+Gunicorn configuration for the Phonebook App
+
+Every setting can be overridden with an environment variable. Send HUP to
+the master for a graceful reload and TERM for a graceful shutdown; workers
+finish in-flight requests for up to GUNICORN_GRACEFUL_TIMEOUT seconds.
+"""
+
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:80')
+
+# Preforked worker processes, each serving requests on a thread pool
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Keep connections from the load balancer open between requests; this must
+# be longer than the ALB idle timeout (60s) to avoid 502s on reused sockets
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '1000'))
+
+# Bind port 80 as root, then drop privileges in the workers
+user = os.getenv('GUNICORN_USER') or None
+group = os.getenv('GUNICORN_GROUP') or None
+
+# Each worker builds its own connection pool and credential refresher after
+# the fork; nothing database related may be created in the master
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+
+def post_worker_init(worker):
+    """Start the credential refresher so the first request does not wait on SSM,
+    and build the autocomplete index in the background.
+
+    Credentials come from SSM_CACHE_FILE when it is fresh; otherwise each
+    worker prefetches them after a random delay, so a restart does not send
+    every worker to SSM at once.
+    """
+    app = getattr(worker.wsgi, 'extensions', {}).get('phonebook')
+    if app is not None:
+        app['credentials'].start()
+        app['autocomplete'].refresh_in_background()
+
+def on_starting(server):
+    """Create or migrate the tables once, before any worker is forked.
+
+    Runs in a subprocess so the master never opens database connections
+    or starts threads that forked workers would inherit.
+    """
+    if os.getenv('PHONEBOOK_SKIP_INIT_DB'):
+        return
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'phonebook-app-secure', 'init-db'],
+        cwd=app_dir,
+    )
+    if result.returncode != 0:
+        logging.getLogger('gunicorn.error').error("Database initialization failed; starting workers anyway")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Load Testing Script for Phonebook App
+Drives a configurable mix of search, add, update and delete traffic from
+concurrent workers at a target rate and reports throughput, latency
+percentiles and error rates
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+
+# security-test.py has a dash in its name, so it is loaded by name
+SecurityTester = importlib.import_module('security-test').SecurityTester
+
+DEFAULT_MIX = {'search': 70, 'add': 10, 'update': 10, 'delete': 10}
+
+# The HTML routes answer 200 even when the database call failed
+FAILURE_MARKERS = ('Database connection failed', 'Failed to', 'Database operation failed')
+
+SEARCH_KEYWORDS = ['a', 'al', 'ali', 'meh', 'ahmet', 'ay', 'can', 'er', 'yil', 'load']
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(text):
+    """Parse 'search=70,add=10,...' into a weight per operation"""
+    mix = {}
+    for part in text.split(','):
+        operation, _, weight = part.partition('=')
+        operation = operation.strip()
+        if operation not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{operation}'")
+        mix[operation] = float(weight)
+    return mix
+
+
+class LoadTester(SecurityTester):
+    def __init__(self, base_url, workers=10, rate=50.0, duration=30.0, mix=None, timeout=10):
+        super().__init__(base_url, timeout=timeout)
+        self.workers = workers
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or dict(DEFAULT_MIX)
+
+        self._slots = itertools.count()
+        self._created = []
+        self._name_counter = itertools.count()
+        self._run_id = f"{int(time.time()) % 100000:05d}"
+        self.samples = {operation: [] for operation in self.mix}
+        self.errors = {operation: 0 for operation in self.mix}
+
+    def _new_name(self):
+        # Letters only: validate_input rejects purely numeric names
+        index = next(self._name_counter)
+        suffix = ''.join(chr(ord('a') + int(digit)) for digit in f"{self._run_id}{index:07d}")
+        return f"loadtest {suffix}"
+
+    def _take_created(self, remove):
+        with self._lock:
+            if not self._created:
+                return None
+            if remove:
+                return self._created.pop(random.randrange(len(self._created)))
+            return random.choice(self._created)
+
+    def _request(self, path, data):
+        return self.session.post(urljoin(self.base_url, path), data=data, timeout=self.timeout)
+
+    def do_search(self):
+        return self._request('/', {'username': random.choice(SEARCH_KEYWORDS)})
+
+    def do_add(self):
+        name = self._new_name()
+        response = self._request('/add', {'username': name, 'phonenumber': f"{random.randrange(10**9, 10**10):010d}"})
+        if response.ok and 'successfully' in response.text:
+            with self._lock:
+                self._created.append(name)
+        return response
+
+    def do_update(self):
+        name = self._take_created(remove=False)
+        if name is None:
+            return self.do_add()
+        return self._request('/update', {'username': name, 'phonenumber': f"{random.randrange(10**9, 10**10):010d}"})
+
+    def do_delete(self):
+        name = self._take_created(remove=True)
+        if name is None:
+            return self.do_add()
+        return self._request('/delete', {'username': name})
+
+    def _wait_for_slot(self, start):
+        """Pace requests so the whole run issues ``rate`` requests per second"""
+        if self.rate <= 0:
+            return
+        slot_time = start + next(self._slots) / self.rate
+        delay = slot_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _record(self, operation, elapsed, failed):
+        with self._lock:
+            self.samples[operation].append(elapsed)
+            if failed:
+                self.errors[operation] += 1
+
+    def _worker(self, start, deadline):
+        operations = list(self.mix)
+        weights = [self.mix[operation] for operation in operations]
+        while True:
+            self._wait_for_slot(start)
+            if time.perf_counter() >= deadline:
+                return
+            operation = random.choices(operations, weights)[0]
+            began = time.perf_counter()
+            try:
+                response = getattr(self, f'do_{operation}')()
+                failed = response.status_code >= 400 or any(marker in response.text for marker in FAILURE_MARKERS)
+            except requests.exceptions.RequestException:
+                failed = True
+            self._record(operation, time.perf_counter() - began, failed)
+
+    def cleanup(self):
+        """Delete every contact this run created and did not delete"""
+        for name in list(self._created):
+            try:
+                self._request('/delete', {'username': name})
+            except requests.exceptions.RequestException as e:
+                print(f"Error deleting {name}: {e}")
+        self._created.clear()
+
+    def run_load_test(self):
+        """Run the configured traffic mix and return the summary"""
+        print("🚀 Starting load test...")
+        print(f"Target URL: {self.base_url}")
+        print(f"Workers: {self.workers}  Rate: {self.rate or 'unlimited'} req/s  Duration: {self.duration}s")
+        print(f"Mix: {', '.join(f'{op}={weight:g}' for op, weight in self.mix.items())}")
+        print("-" * 50)
+
+        start = time.perf_counter()
+        deadline = start + self.duration
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in range(self.workers):
+                executor.submit(self._worker, start, deadline)
+        elapsed = time.perf_counter() - start
+
+        summary = self.summarize(elapsed)
+        self.print_load_results(summary)
+        return summary
+
+    def summarize(self, elapsed):
+        def stats(latencies, errors):
+            latencies = sorted(latencies)
+            return {
+                'requests': len(latencies),
+                'errors': errors,
+                'error_rate': errors / len(latencies) if latencies else 0.0,
+                'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+                'max_ms': (latencies[-1] * 1000) if latencies else 0.0,
+            }
+
+        all_latencies = [value for values in self.samples.values() for value in values]
+        return {
+            'target': self.base_url,
+            'workers': self.workers,
+            'target_rate_rps': self.rate,
+            'duration_s': elapsed,
+            'mix': self.mix,
+            'overall': stats(all_latencies, sum(self.errors.values())),
+            'operations': {operation: stats(self.samples[operation], self.errors[operation]) for operation in self.mix},
+        }
+
+    def print_load_results(self, summary):
+        print(f"{'operation':<10} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>8}")
+        rows = list(summary['operations'].items()) + [('overall', summary['overall'])]
+        for operation, stats in rows:
+            print(f"{operation:<10} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+                  f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['error_rate']:>7.1%}")
+        print("-" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Phonebook App')
+    parser.add_argument('base_url', help='Example: http://localhost:5000')
+    parser.add_argument('--workers', type=int, default=10, help='Concurrent workers (default: 10)')
+    parser.add_argument('--rate', type=float, default=50.0, help='Target requests per second, 0 for unlimited (default: 50)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run (default: 30)')
+    parser.add_argument('--mix', type=parse_mix, default=dict(DEFAULT_MIX),
+                        help='Operation weights (default: search=70,add=10,update=10,delete=10)')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds (default: 10)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--no-cleanup', action='store_true', help='Keep the contacts created by the run')
+    args = parser.parse_args()
+
+    tester = LoadTester(args.base_url, workers=args.workers, rate=args.rate,
+                        duration=args.duration, mix=args.mix, timeout=args.timeout)
+    try:
+        summary = tester.run_load_test()
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Load test interrupted by user")
+        sys.exit(1)
+    finally:
+        if not args.no_cleanup:
+            tester.cleanup()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Prometheus-style metrics for the Phonebook App
+
+Updates go to one of SHARD_COUNT shards, picked by thread id and guarded
+by its own lock, so request threads rarely contend with each other and
+memory stays bounded however many threads come and go; shards are only
+summed when /metrics is scraped. Values are per process: with several
+gunicorn workers each worker reports its own series.
+"""
+
+import bisect
+import threading
+
+SHARD_COUNT = 16
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Shard:
+    __slots__ = ('lock', 'values')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = tuple(_Shard() for _ in range(SHARD_COUNT))
+
+    def _shard(self):
+        # Native thread ids are handed out sequentially, unlike get_ident()
+        # values, which are aligned addresses and would share one shard
+        return self._shards[threading.get_native_id() % SHARD_COUNT]
+
+    def _snapshot(self):
+        for shard in self._shards:
+            with shard.lock:
+                yield dict(shard.values)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._render_samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, labelvalues=(), amount=1):
+        shard = self._shard()
+        with shard.lock:
+            shard.values[labelvalues] = shard.values.get(labelvalues, 0) + amount
+
+    def _totals(self):
+        totals = {}
+        for values in self._snapshot():
+            for labelvalues, value in values.items():
+                totals[labelvalues] = totals.get(labelvalues, 0) + value
+        return totals
+
+    def _render_samples(self):
+        for labelvalues, value in sorted(self._totals().items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}'
+
+
+class Gauge(Counter):
+    """Value that can go up and down, such as requests in flight"""
+
+    kind = 'gauge'
+
+    def dec(self, labelvalues=(), amount=1):
+        self.inc(labelvalues, -amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labelvalues, value):
+        index = bisect.bisect_left(self.buckets, value)
+        shard = self._shard()
+        with shard.lock:
+            entry = shard.values.get(labelvalues)
+            if entry is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count
+                entry = shard.values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _render_samples(self):
+        totals = {}
+        for values in self._snapshot():
+            for labelvalues, (counts, total, count) in values.items():
+                merged = totals.setdefault(labelvalues, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+
+        for labelvalues, (counts, total, count) in sorted(totals.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, labelvalues, ('le', _format_value(bound)))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the text exposition format.
+
+    Collectors are callables returning (name, type, help, labelnames,
+    {labelvalues: value}) tuples; they are evaluated at scrape time for
+    values that already live elsewhere, such as pool and cache statistics.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, labelnames, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labelvalues, value in samples.items():
+                    lines.append(f'{name}{_format_labels(labelnames, labelvalues)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
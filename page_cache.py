@@ -0,0 +1,46 @@
+"""
+Rendered-page cache for the static GET views of the Phonebook App
+"""
+
+import hashlib
+import threading
+
+
+class PageCache:
+    """Cache of rendered pages whose content depends only on their arguments.
+
+    Each page is rendered once per process and kept with a strong ETag
+    derived from its bytes, so conditional requests can be answered
+    without rendering. Templates only change on deploy, which restarts
+    the workers and empties the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}  # key -> (body, etag)
+        self.hits = 0
+        self.renders = 0
+
+    def get(self, key, render):
+        """Return (body, etag) for key, calling render() on the first request"""
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self.hits += 1
+                return page
+
+        # Rendered outside the lock; a concurrent first request may render
+        # the same page twice, which is harmless
+        body = render().encode('utf-8')
+        page = (body, hashlib.sha256(body).hexdigest()[:32])
+        with self._lock:
+            self.renders += 1
+            return self._pages.setdefault(key, page)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'pages': len(self._pages), 'hits': self.hits, 'renders': self.renders}
@@ -1,205 +1,630 @@
 # Import Flask modules
-from flask import Flask, request, render_template, flash, redirect, url_for
-from flaskext.mysql import MySQL
-import boto3
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, request, render_template, flash, redirect, url_for, jsonify, stream_with_context
+from itsdangerous import BadSignature, URLSafeSerializer
+import pymysql
+import click
+import base64
+import csv
+import functools
+import hashlib
+import io
+import json
 import logging
 import os
-from werkzeug.security import safe_str_cmp
+import time
+from db_pool import ConnectionPool, ReplicaSet
+from search_cache import SearchCache
+from page_cache import PageCache
+from autocomplete import PrefixIndex
+from ssm_credentials import CredentialProvider, LocalParameterSource, SSMParameterSource
+from metrics import MetricsRegistry
+from db_instrumentation import InstrumentedCursor, request_db_stats, server_timing_header
+from dataset import load_dataset
+from search_index import fuzzy_distance, fuzzy_trigrams, max_edit_distance
+from storage import DuplicateName, MemoryStorage, MySQLStorage, SQLiteStorage, StorageUnavailable, normalize_name, normalize_number
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_ssm_parameters():
-    """Safely retrieve SSM parameters with error handling"""
+# Routes are registered on the blueprint by create_app()
+phonebook = Blueprint('phonebook', __name__, cli_group=None)
+
+IMPORT_MAX_ERRORS = 1000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'phonebook.csv'),
+    'jsonl': ('application/x-ndjson', 'phonebook.jsonl'),
+    'vcard': ('text/vcard', 'phonebook.vcf'),
+}
+
+def load_config(app):
+    """Read application settings from the environment"""
+    app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-in-production')
+
+    # SSM parameter names and caching
+    app.config['SSM_USERNAME_PARAM'] = os.getenv('SSM_USERNAME_PARAM', '/ismail/phonebook/username')
+    app.config['SSM_PASSWORD_PARAM'] = os.getenv('SSM_PASSWORD_PARAM', '/ismail/phonebook/password')
+    app.config['SSM_CACHE_TTL'] = float(os.getenv('SSM_CACHE_TTL', '300'))
+    app.config['SSM_CACHE_FILE'] = os.getenv('SSM_CACHE_FILE')
+    app.config['SSM_LOCAL_PARAMETERS'] = os.getenv('SSM_LOCAL_PARAMETERS')
+
+    # Storage backend: mysql (default), sqlite or memory
+    app.config['STORAGE_BACKEND'] = os.getenv('STORAGE_BACKEND', 'mysql')
+    app.config['SQLITE_PATH'] = os.getenv('SQLITE_PATH', 'phonebook.db')
+
+    # Database configuration; credentials come from SSM when a connection is opened
+    app.config['MYSQL_DATABASE_HOST'] = os.getenv('DB_HOST', 'localhost')
+    app.config['MYSQL_DATABASE_DB'] = 'ismail_phonebook'
+    app.config['MYSQL_DATABASE_PORT'] = 3306
+
+    # Read replicas ("host[:port],...") that serve searches; writes always go to DB_HOST
+    app.config['MYSQL_REPLICA_HOSTS'] = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+    app.config['DB_REPLICA_EJECT_SECONDS'] = float(os.getenv('DB_REPLICA_EJECT_SECONDS', '30'))
+    # Seconds a search waits for a replica to apply the caller's last write before trying the next one
+    app.config['DB_REPLICA_WAIT_TIMEOUT'] = float(os.getenv('DB_REPLICA_WAIT_TIMEOUT', '0.05'))
+
+    # Seconds a client carries the consistency token of its last write
+    app.config['CONSISTENCY_TOKEN_TTL'] = int(os.getenv('CONSISTENCY_TOKEN_TTL', '60'))
+
+    # Connection pool configuration
+    app.config['DB_POOL_MIN_SIZE'] = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    app.config['DB_POOL_MAX_SIZE'] = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+    app.config['DB_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+    app.config['DB_POOL_MAX_LIFETIME'] = float(os.getenv('DB_POOL_MAX_LIFETIME', '3600'))
+    app.config['DB_POOL_MAX_IDLE'] = float(os.getenv('DB_POOL_MAX_IDLE', '300'))
+
+    # Number of search results rendered per page
+    app.config['SEARCH_PAGE_SIZE'] = int(os.getenv('SEARCH_PAGE_SIZE', '50'))
+
+    # Names fetched from the trigram index and compared by edit distance per fuzzy search
+    app.config['FUZZY_CANDIDATES'] = int(os.getenv('FUZZY_CANDIDATES', '500'))
+
+    # Search result cache; SEARCH_CACHE_SIZE=0 disables it
+    app.config['SEARCH_CACHE_SIZE'] = int(os.getenv('SEARCH_CACHE_SIZE', '1024'))
+    app.config['SEARCH_CACHE_TTL'] = float(os.getenv('SEARCH_CACHE_TTL', '30'))
+
+    # Search-as-you-type suggestions per request, how often each worker reads the names added
+    # since its last refresh, and how often it reloads every name to drop deleted ones
+    app.config['AUTOCOMPLETE_LIMIT'] = int(os.getenv('AUTOCOMPLETE_LIMIT', '10'))
+    app.config['AUTOCOMPLETE_REFRESH_SECONDS'] = float(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', '60'))
+    app.config['AUTOCOMPLETE_RELOAD_SECONDS'] = float(os.getenv('AUTOCOMPLETE_RELOAD_SECONDS', '3600'))
+
+    # Browser cache lifetime of the static GET pages, which always revalidate with an ETag afterwards
+    app.config['PAGE_CACHE_MAX_AGE'] = int(os.getenv('PAGE_CACHE_MAX_AGE', '300'))
+
+    # Statements slower than this are written to the phonebook.slow_query log
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+
+    # Rows written per transaction by bulk imports
+    app.config['IMPORT_BATCH_SIZE'] = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+
+def build_parameter_source(config):
+    """Use the local JSON stand-in when SSM_LOCAL_PARAMETERS is set, SSM otherwise"""
+    if config['SSM_LOCAL_PARAMETERS']:
+        return LocalParameterSource.from_file(config['SSM_LOCAL_PARAMETERS'])
+    return SSMParameterSource(os.getenv('AWS_REGION', 'us-east-1'))
+
+def create_app(config=None):
+    """Create and configure a Phonebook application.
+
+    Settings come from the environment and may be overridden with the
+    ``config`` mapping. Each application owns its credential provider,
+    storage backend and search cache, all of which initialize lazily.
+    """
+    app = Flask(__name__)
+    load_config(app)
+    if config:
+        app.config.update(config)
+
+    credentials = CredentialProvider(
+        build_parameter_source(app.config),
+        [app.config['SSM_USERNAME_PARAM'], app.config['SSM_PASSWORD_PARAM']],
+        ttl=app.config['SSM_CACHE_TTL'],
+        cache_path=app.config['SSM_CACHE_FILE'],
+    )
+    storage = build_storage(app)
+    search_cache = SearchCache(app.config['SEARCH_CACHE_SIZE'], app.config['SEARCH_CACHE_TTL'])
+    app.extensions['phonebook'] = {
+        'credentials': credentials,
+        'storage': storage,
+        'search_cache': search_cache,
+        'page_cache': PageCache(),
+        'autocomplete': PrefixIndex(functools.partial(load_name_keys, app),
+                                    app.config['AUTOCOMPLETE_REFRESH_SECONDS'], app.config['AUTOCOMPLETE_RELOAD_SECONDS']),
+        'metrics': create_metrics(storage, search_cache),
+    }
+
+    app.register_blueprint(phonebook)
+
+    # Nothing touches SSM or the database here: credentials are fetched and
+    # connections opened on first use, so creating the app stays cheap
+    return app
+
+def build_storage(app):
+    """Create the storage backend selected by STORAGE_BACKEND"""
+    backend = app.config['STORAGE_BACKEND']
+    if backend == 'mysql':
+        replicas = None
+        if app.config['MYSQL_REPLICA_HOSTS']:
+            replicas = ReplicaSet(
+                {address: build_connection_pool(app, lambda address=address: open_db_connection(app, address))
+                 for address in app.config['MYSQL_REPLICA_HOSTS']},
+                eject_seconds=app.config['DB_REPLICA_EJECT_SECONDS'],
+            )
+        return MySQLStorage(build_connection_pool(app, lambda: open_db_connection(app)), replicas,
+                            replica_wait_timeout=app.config['DB_REPLICA_WAIT_TIMEOUT'])
+    if backend == 'sqlite':
+        return SQLiteStorage(app.config['SQLITE_PATH'])
+    if backend == 'memory':
+        return MemoryStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'; expected mysql, sqlite or memory")
+
+def load_name_keys(app, after_id=0):
+    """(id, name_key) of every person with an id above after_id, for the
+    autocomplete index; may run outside a request"""
+    with app.app_context():
+        rows = app.extensions['phonebook']['storage'].iter_rows(after_id)
+        try:
+            return [(row[0], row[3]) for row in rows]
+        finally:
+            close_rows(rows)
+
+def build_connection_pool(app, connect):
+    """Create a connection pool sized by the DB_POOL_* settings"""
+    return ConnectionPool(
+        connect,
+        min_size=app.config['DB_POOL_MIN_SIZE'],
+        max_size=app.config['DB_POOL_MAX_SIZE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        max_lifetime=app.config['DB_POOL_MAX_LIFETIME'],
+        max_idle=app.config['DB_POOL_MAX_IDLE'],
+    )
+
+def create_metrics(storage, search_cache):
+    """Create the request and database metrics exposed on /metrics"""
+    registry = MetricsRegistry()
+
+    def collect_state():
+        backend = storage.stats()
+        cache = search_cache.stats()
+        state = [
+            ('phonebook_search_cache_lookups_total', 'counter', 'Search cache lookups by result',
+             ('result',), {('hit',): cache['hits'], ('miss',): cache['misses']}),
+            ('phonebook_search_cache_entries', 'gauge', 'Cached search pages',
+             (), {(): cache['entries']}),
+        ]
+        if 'idle' in backend:
+            state.append(('phonebook_db_pool_connections', 'gauge', 'Pooled database connections by state',
+                          ('state',), {('idle',): backend['idle'], ('in_use',): backend['in_use']}))
+        replicas = backend.get('replicas')
+        if replicas:
+            state.append(('phonebook_db_replica_healthy', 'gauge', 'Whether a read replica is in rotation',
+                          ('replica',), {(name,): int(replica['healthy']) for name, replica in replicas.items()}))
+            state.append(('phonebook_db_replica_pool_connections', 'gauge', 'Pooled read replica connections by state',
+                          ('replica', 'state'),
+                          {(name, pool_state): replica[pool_state]
+                           for name, replica in replicas.items() for pool_state in ('idle', 'in_use')}))
+        return state
+
+    registry.add_collector(collect_state)
+    return {
+        'registry': registry,
+        'requests': registry.counter(
+            'phonebook_http_requests_total', 'HTTP requests handled', ('endpoint', 'method', 'status')),
+        'in_flight': registry.gauge(
+            'phonebook_http_requests_in_flight', 'HTTP requests currently being handled', ('endpoint',)),
+        'latency': registry.histogram(
+            'phonebook_http_request_duration_seconds', 'HTTP request latency', ('endpoint', 'method', 'status')),
+        'db_latency': registry.histogram(
+            'phonebook_db_operation_duration_seconds', 'Duration of data function calls, including connection checkout',
+            ('operation',)),
+        'db_round_trips': registry.histogram(
+            'phonebook_db_round_trips_per_request', 'Database round trips made while handling a request',
+            ('endpoint',), buckets=(0, 1, 2, 3, 5, 10, 25, 50)),
+    }
+
+def phonebook_state(name):
+    """Return a per-application object created by create_app()"""
+    return current_app.extensions['phonebook'][name]
+
+def get_ssm_parameters(app=None):
+    """Return (username, password) from the cached SSM parameters"""
+    app = app or current_app
     try:
-        ssm = boto3.client('ssm', region_name=os.getenv('AWS_REGION', 'us-east-1'))
-        
-        # AWS SSM Parameters
-        username_param = ssm.get_parameter(Name='/ismail/phonebook/username')
-        password_param = ssm.get_parameter(Name="/ismail/phonebook/password", WithDecryption=True)
-        
-        # Get parameter values
-        username = username_param['Parameter']['Value']
-        password = password_param['Parameter']['Value']
-        
-        return username, password
+        values = app.extensions['phonebook']['credentials'].get()
+        return values[app.config['SSM_USERNAME_PARAM']], values[app.config['SSM_PASSWORD_PARAM']]
     except Exception as e:
         logger.error(f"Failed to retrieve SSM parameters: {e}")
         raise
 
-# Flask application
-app = Flask(__name__)
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-in-production')
-
-# Get database credentials from SSM
-try:
-    db_username, db_password = get_ssm_parameters()
-except Exception as e:
-    logger.error(f"Failed to initialize database credentials: {e}")
-    db_username, db_password = None, None
-
-# Database configuration
-app.config['MYSQL_DATABASE_HOST'] = os.getenv('DB_HOST', 'localhost')
-app.config['MYSQL_DATABASE_USER'] = db_username
-app.config['MYSQL_DATABASE_PASSWORD'] = db_password
-app.config['MYSQL_DATABASE_DB'] = 'ismail_phonebook'
-app.config['MYSQL_DATABASE_PORT'] = 3306
-
-# Initialize MySQL
-mysql = MySQL()
-mysql.init_app(app)
-
-def get_db_connection():
-    """Get database connection with error handling"""
-    try:
-        connection = mysql.connect()
-        connection.autocommit(True)
-        return connection
-    except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        return None
+def open_db_connection(app, address=None):
+    """Open a new autocommit database connection with the current credentials.
+
+    Connects to the primary unless a replica ``address`` ("host[:port]") is
+    given. Settings are read from this app's config and the credentials are
+    passed straight to the driver, so apps in the same process never see
+    each other's settings and the secrets never land in app.config.
+    """
+    username, password = get_ssm_parameters(app)
+    if address is None:
+        host, port = app.config['MYSQL_DATABASE_HOST'], app.config['MYSQL_DATABASE_PORT']
+    else:
+        host, _, port = address.partition(':')
+        port = int(port) if port else app.config['MYSQL_DATABASE_PORT']
+    connection = pymysql.connect(
+        host=host,
+        port=port,
+        user=username,
+        password=password,
+        db=app.config['MYSQL_DATABASE_DB'],
+        charset=app.config.get('MYSQL_DATABASE_CHARSET', 'utf8'),
+        cursorclass=InstrumentedCursor,
+    )
+    connection.autocommit(True)
+    return connection
+
+def timed_db_operation(operation):
+    """Record the duration of a data function in the DB latency histogram"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                phonebook_state('metrics')['db_latency'].observe((operation,), time.perf_counter() - start)
+        return wrapper
+    return decorator
 
 def init_phonebook_db():
-    """Initialize phonebook table"""
+    """Create or migrate the tables of the configured storage backend"""
     try:
-        connection = get_db_connection()
-        if not connection:
-            return False
-            
-        cursor = connection.cursor()
-        phonebook_table = """
-        CREATE TABLE IF NOT EXISTS ismail_phonebook.phonebook(
-        id INT NOT NULL AUTO_INCREMENT,
-        name VARCHAR(100) NOT NULL,
-        number VARCHAR(100) NOT NULL,
-        PRIMARY KEY (id)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-        """
-        cursor.execute(phonebook_table)
-        cursor.close()
-        connection.close()
+        phonebook_state('storage').init_schema()
         return True
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         return False
 
-def find_persons(keyword):
-    """Find persons by keyword using parameterized queries"""
+def encode_search_cursor(name_key, person_id):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    payload = json.dumps([name_key, person_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_search_cursor(token):
+    """Decode a cursor from encode_search_cursor; invalid cursors yield None"""
+    if not token:
+        return None
     try:
-        connection = get_db_connection()
-        if not connection:
-            return [{'name': 'Database Error', 'number': 'Connection failed'}]
-            
-        cursor = connection.cursor()
-        
-        # Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM phonebook WHERE LOWER(name) LIKE %s"
-        search_term = f"%{keyword.strip().lower()}%"
-        cursor.execute(query, (search_term,))
-        
-        result = cursor.fetchall()
-        persons = [{'id': row[0], 'name': row[1].strip().title(), 'number': row[2]} for row in result]
-        
-        cursor.close()
-        connection.close()
-        
-        if len(persons) == 0:
-            persons = [{'name': 'No Result', 'number': 'No Result'}]
-        return persons
+        name_key, person_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        if not isinstance(name_key, str) or not isinstance(person_id, int):
+            return None
+        return name_key, person_id
+    except Exception:
+        logger.warning("Ignoring invalid search cursor")
+        return None
+
+CONSISTENCY_HEADER = 'X-Consistency-Token'
+CONSISTENCY_COOKIE = 'phonebook_consistency'
+
+def consistency_serializer():
+    return URLSafeSerializer(current_app.secret_key, salt='phonebook-consistency')
+
+def issue_consistency_token():
+    """Remember a read-your-writes token for the write this request just made.
+
+    The token is signed and holds the backend's write position, if it has
+    one, and the time of the write; send_consistency_token hands it to the
+    client. Writes outside a request, such as CLI imports, get no token.
+    """
+    if not has_request_context():
+        return
+    try:
+        position = phonebook_state('storage').write_position()
     except Exception as e:
-        logger.error(f"Error in find_persons: {e}")
-        return [{'name': 'Error', 'number': 'Database operation failed'}]
+        # Without a position searches may still read from a lagging replica
+        logger.warning(f"Could not read write position: {e}")
+        position = None
+    g.consistency_token = consistency_serializer().dumps([position, time.time()])
+
+def decode_consistency_token(token):
+    """Decode a token from issue_consistency_token into (position, written_at).
 
-def insert_person(name, number):
-    """Insert person using parameterized queries"""
+    Invalid, forged and expired tokens yield None.
+    """
+    if not token:
+        return None
     try:
-        connection = get_db_connection()
-        if not connection:
-            return 'Database connection failed'
-            
-        cursor = connection.cursor()
-        
-        # Check if person exists
-        check_query = "SELECT * FROM phonebook WHERE LOWER(name) = %s"
-        cursor.execute(check_query, (name.strip().lower(),))
-        row = cursor.fetchone()
-        
-        if row is not None:
-            cursor.close()
-            connection.close()
-            return f'Person with name {row[1].title()} already exists.'
-        
-        # Insert new person
-        insert_query = "INSERT INTO phonebook (name, number) VALUES (%s, %s)"
-        cursor.execute(insert_query, (name.strip().lower(), number))
-        
-        cursor.close()
-        connection.close()
-        return f'Person {name.strip().title()} added to Phonebook successfully'
+        position, written_at = consistency_serializer().loads(token)
+    except (BadSignature, TypeError, ValueError):
+        logger.warning("Ignoring invalid consistency token")
+        return None
+    if not isinstance(written_at, (int, float)) or time.time() - written_at > current_app.config['CONSISTENCY_TOKEN_TTL']:
+        return None
+    return position, written_at
+
+def request_consistency():
+    """Consistency token sent with this request as a header or cookie"""
+    return decode_consistency_token(request.headers.get(CONSISTENCY_HEADER) or request.cookies.get(CONSISTENCY_COOKIE))
+
+# Outcomes reported by the data functions; the HTML routes turn them into
+# messages and the JSON API turns them into status codes
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+FOUND = 'found'
+EXISTS = 'exists'
+NOT_FOUND = 'not_found'
+UNAVAILABLE = 'unavailable'
+FAILED = 'failed'
+
+INSERT_MESSAGES = {
+    CREATED: 'Person {name} added to Phonebook successfully',
+    UPDATED: 'Phone record of {name} is updated successfully',
+    EXISTS: 'Person with name {name} already exists.',
+    UNAVAILABLE: 'Database connection failed',
+    FAILED: 'Failed to add person to database',
+}
+
+UPDATE_MESSAGES = {
+    UPDATED: 'Phone record of {name} is updated successfully',
+    NOT_FOUND: 'Person with name {name} does not exist.',
+    UNAVAILABLE: 'Database connection failed',
+    FAILED: 'Failed to update person in database',
+}
+
+DELETE_MESSAGES = {
+    DELETED: 'Phone record of {name} is deleted from the phonebook successfully',
+    NOT_FOUND: 'Person with name {name} does not exist, no need to delete.',
+    UNAVAILABLE: 'Database connection failed',
+    FAILED: 'Failed to delete person from database',
+}
+
+def person_from_row(row):
+    """Convert an (id, name, number, ...) row into a person dict"""
+    return {'id': row[0], 'name': row[1].strip().title(), 'number': row[2]}
+
+def search_persons(keyword, limit=None, cursor=None, consistency=None):
+    """Find one page of persons by keyword, serving repeats from the cache.
+
+    Results are ordered by (name_key, id). ``consistency`` is a decoded
+    consistency token: the page then reflects that write, so the cache is
+    skipped and replicas must have applied it. Returns (status, persons,
+    next_cursor); next_cursor is None on the last page.
+    """
+    limit = limit or current_app.config['SEARCH_PAGE_SIZE']
+    after = decode_search_cursor(cursor)
+    position = consistency[0] if consistency else None
+    cache_key = (normalize_name(keyword), limit, cursor if after is not None else None)
+    # Another worker's cache is not invalidated by this client's write, and
+    # a page cached after the write may still have come from a lagging
+    # replica, so only clients without a pending write are served from it
+    if consistency is None:
+        cached = phonebook_state('search_cache').get(cache_key)
+        if cached is not None:
+            return FOUND, cached[0], cached[1]
+
+    status, persons, next_cursor = query_persons(keyword, limit, after, position)
+    if status == FOUND:
+        phonebook_state('search_cache').put(cache_key, (persons, next_cursor))
+    return status, persons, next_cursor
+
+@timed_db_operation('search')
+def query_persons(keyword, limit, after, min_position=None):
+    """Query one page of persons by keyword from the storage backend"""
+    try:
+        result = phonebook_state('storage').search(normalize_name(keyword), limit + 1, after, min_position)
+    except StorageUnavailable:
+        return UNAVAILABLE, [], None
     except Exception as e:
-        logger.error(f"Error in insert_person: {e}")
-        return 'Failed to add person to database'
+        logger.error(f"Error in query_persons: {e}")
+        return FAILED, [], None
 
-def update_person(name, number):
-    """Update person using parameterized queries"""
+    next_cursor = None
+    if len(result) > limit:
+        result = result[:limit]
+        next_cursor = encode_search_cursor(result[-1][3], result[-1][0])
+    persons = [person_from_row(row) for row in result]
+    return FOUND, persons, next_cursor
+
+def fuzzy_search_persons(keyword, limit=None, consistency=None):
+    """Find persons whose names are within a few typos of keyword, closest first.
+
+    Candidates sharing trigrams with the keyword come from the trigram
+    index, and only they are compared by edit distance. Keywords too short
+    for trigrams get the exact search instead, and their persons carry a
+    'distance' of None. Returns (status, persons); each person carries its
+    'distance'.
+    """
+    limit = limit or current_app.config['SEARCH_PAGE_SIZE']
+    keyword = normalize_name(keyword)
+    grams = fuzzy_trigrams(keyword)
+    if grams is None:
+        status, persons, _ = search_persons(keyword, limit, consistency=consistency)
+        return status, [dict(person, distance=None) for person in persons]
+
+    max_distance = max_edit_distance(keyword)
+    # Each edit destroys at most three trigrams of the keyword
+    min_shared = max(1, len(grams) - 3 * max_distance)
+    status, rows = query_fuzzy_candidates(grams, min_shared, len(keyword), consistency[0] if consistency else None)
+    if status != FOUND:
+        return status, []
+
+    ranked = []
+    for row in rows:
+        distance = fuzzy_distance(keyword, row[3], max_distance)
+        if distance <= max_distance:
+            ranked.append((distance, row[3], row[0], row))
+    ranked.sort(key=lambda match: match[:3])
+    return FOUND, [dict(person_from_row(row), distance=distance) for distance, _, _, row in ranked[:limit]]
+
+@timed_db_operation('fuzzy_search')
+def query_fuzzy_candidates(grams, min_shared, length, min_position=None):
+    """Query the rows sharing the most trigrams with a fuzzy keyword of this length"""
     try:
-        connection = get_db_connection()
-        if not connection:
-            return 'Database connection failed'
-            
-        cursor = connection.cursor()
-        
-        # Check if person exists
-        check_query = "SELECT * FROM phonebook WHERE LOWER(name) = %s"
-        cursor.execute(check_query, (name.strip().lower(),))
-        row = cursor.fetchone()
-        
-        if row is None:
-            cursor.close()
-            connection.close()
-            return f'Person with name {name.strip().title()} does not exist.'
-        
-        # Update person
-        update_query = "UPDATE phonebook SET name = %s, number = %s WHERE id = %s"
-        cursor.execute(update_query, (row[1], number, row[0]))
-        
-        cursor.close()
-        connection.close()
-        return f'Phone record of {name.strip().title()} is updated successfully'
+        rows = phonebook_state('storage').fuzzy_candidates(
+            grams, min_shared, length, current_app.config['FUZZY_CANDIDATES'], min_position)
+    except StorageUnavailable:
+        return UNAVAILABLE, []
     except Exception as e:
-        logger.error(f"Error in update_person: {e}")
-        return 'Failed to update person in database'
+        logger.error(f"Error in query_fuzzy_candidates: {e}")
+        return FAILED, []
+    return FOUND, rows
 
-def delete_person(name):
-    """Delete person using parameterized queries"""
+def find_persons(keyword, limit=None, cursor=None, consistency=None, fuzzy=False):
+    """Find one page of persons by keyword for the HTML search page.
+
+    With fuzzy=True the closest names are returned on a single page.
+    Returns (persons, next_cursor), with placeholder rows for errors and
+    empty first pages.
+    """
+    if fuzzy:
+        status, persons = fuzzy_search_persons(keyword, limit, consistency)
+        next_cursor = None
+    else:
+        status, persons, next_cursor = search_persons(keyword, limit, cursor, consistency)
+    if status == UNAVAILABLE:
+        return [{'name': 'Database Error', 'number': 'Connection failed'}], None
+    if status == FAILED:
+        return [{'name': 'Error', 'number': 'Database operation failed'}], None
+    if len(persons) == 0 and not cursor:
+        return [{'name': 'No Result', 'number': 'No Result'}], None
+    return persons, next_cursor
+
+def search_persons_by_number(number, prefix=False, limit=None, cursor=None, consistency=None):
+    """Find one page of persons whose phone number is, or with prefix=True
+    starts with, number.
+
+    Separators are ignored, so '0 (212) 555' matches 0212555.... Results
+    are ordered by (number_key, id). Returns (status, persons, next_cursor).
+    """
+    limit = limit or current_app.config['SEARCH_PAGE_SIZE']
+    position = consistency[0] if consistency else None
+    return query_persons_by_number(normalize_number(number), prefix, limit, decode_search_cursor(cursor), position)
+
+@timed_db_operation('search_number')
+def query_persons_by_number(number_key, prefix, limit, after, min_position=None):
+    """Query one page of persons by number_key from the storage backend"""
     try:
-        connection = get_db_connection()
-        if not connection:
-            return 'Database connection failed'
-            
-        cursor = connection.cursor()
-        
-        # Check if person exists
-        check_query = "SELECT * FROM phonebook WHERE LOWER(name) = %s"
-        cursor.execute(check_query, (name.strip().lower(),))
-        row = cursor.fetchone()
-        
-        if row is None:
-            cursor.close()
-            connection.close()
-            return f'Person with name {name.strip().title()} does not exist, no need to delete.'
-        
-        # Delete person
-        delete_query = "DELETE FROM phonebook WHERE id = %s"
-        cursor.execute(delete_query, (row[0],))
-        
-        cursor.close()
-        connection.close()
-        return f'Phone record of {name.strip().title()} is deleted from the phonebook successfully'
+        result = phonebook_state('storage').search_number(number_key, limit + 1, after, prefix, min_position)
+    except StorageUnavailable:
+        return UNAVAILABLE, [], None
+    except Exception as e:
+        logger.error(f"Error in query_persons_by_number: {e}")
+        return FAILED, [], None
+
+    next_cursor = None
+    if len(result) > limit:
+        result = result[:limit]
+        next_cursor = encode_search_cursor(normalize_number(result[-1][2]), result[-1][0])
+    return FOUND, [person_from_row(row) for row in result], next_cursor
+
+def find_persons_by_number(number, prefix=False, cursor=None, consistency=None):
+    """Find one page of persons by phone number for the HTML lookup page"""
+    status, persons, next_cursor = search_persons_by_number(number, prefix, cursor=cursor, consistency=consistency)
+    if status == UNAVAILABLE:
+        return [{'name': 'Database Error', 'number': 'Connection failed'}], None
+    if status == FAILED:
+        return [{'name': 'Error', 'number': 'Database operation failed'}], None
+    if len(persons) == 0 and not cursor:
+        return [{'name': 'No Result', 'number': 'No Result'}], None
+    return persons, next_cursor
+
+@timed_db_operation('get')
+def get_person(name):
+    """Look up a single person by exact name. Returns (status, person)"""
+    try:
+        row = phonebook_state('storage').get(normalize_name(name))
+    except StorageUnavailable:
+        return UNAVAILABLE, None
+    except Exception as e:
+        logger.error(f"Error in get_person: {e}")
+        return FAILED, None
+
+    if row is None:
+        return NOT_FOUND, None
+    return FOUND, person_from_row(row)
+
+@timed_db_operation('insert')
+def save_person(name, number, upsert=False):
+    """Insert person, relying on the backend's unique name_key to detect duplicates.
+
+    With upsert=True an existing person's number is overwritten instead of
+    reporting a duplicate. Returns CREATED, UPDATED, EXISTS, UNAVAILABLE
+    or FAILED.
+    """
+    name_key = normalize_name(name)
+    try:
+        inserted = phonebook_state('storage').save(name_key, number, upsert)
+    except StorageUnavailable:
+        return UNAVAILABLE
+    except DuplicateName:
+        return EXISTS
     except Exception as e:
-        logger.error(f"Error in delete_person: {e}")
-        return 'Failed to delete person from database'
+        logger.error(f"Error in save_person: {e}")
+        return FAILED
+
+    phonebook_state('search_cache').invalidate(name_key)
+    if inserted:
+        phonebook_state('autocomplete').add(name_key)
+    issue_consistency_token()
+    return CREATED if inserted else UPDATED
+
+def insert_person(name, number, upsert=False):
+    """Insert person and describe the outcome"""
+    status = save_person(name, number, upsert)
+    return INSERT_MESSAGES[status].format(name=name.strip().title())
+
+@timed_db_operation('update')
+def change_person(name, number):
+    """Update person's number.
+
+    Returns UPDATED, NOT_FOUND, UNAVAILABLE or FAILED.
+    """
+    name_key = normalize_name(name)
+    try:
+        if not phonebook_state('storage').update(name_key, number):
+            return NOT_FOUND
+    except StorageUnavailable:
+        return UNAVAILABLE
+    except Exception as e:
+        logger.error(f"Error in change_person: {e}")
+        return FAILED
+
+    phonebook_state('search_cache').invalidate(name_key)
+    issue_consistency_token()
+    return UPDATED
+
+def update_person(name, number):
+    """Update person and describe the outcome"""
+    status = change_person(name, number)
+    return UPDATE_MESSAGES[status].format(name=name.strip().title())
+
+@timed_db_operation('delete')
+def remove_person(name):
+    """Delete person.
+
+    Returns DELETED, NOT_FOUND, UNAVAILABLE or FAILED.
+    """
+    name_key = normalize_name(name)
+    try:
+        if not phonebook_state('storage').delete(name_key):
+            return NOT_FOUND
+    except StorageUnavailable:
+        return UNAVAILABLE
+    except Exception as e:
+        logger.error(f"Error in remove_person: {e}")
+        return FAILED
+
+    phonebook_state('search_cache').invalidate(name_key)
+    phonebook_state('autocomplete').discard(name_key)
+    issue_consistency_token()
+    return DELETED
+
+def delete_person(name):
+    """Delete person and describe the outcome"""
+    status = remove_person(name)
+    return DELETE_MESSAGES[status].format(name=name.strip().title())
 
 def validate_input(name, phone_number=None):
     """Validate input data"""
@@ -219,7 +644,190 @@ def validate_input(name, phone_number=None):
     
     return True, "Valid input"
 
-@app.route('/', methods=['GET', 'POST'])
+def validate_number_query(number):
+    """Validate a phone number or number prefix to look up"""
+    if not number or not number.strip():
+        return False, "Phone number cannot be empty"
+    if not normalize_number(number):
+        return False, "Phone number should contain digits"
+    if len(number) > 100:
+        return False, "Phone number is too long"
+    return True, "Valid input"
+
+def read_import_rows(lines):
+    """Yield (line_number, name, number) from CSV lines, skipping a name,number header"""
+    for line_number, row in enumerate(csv.reader(lines), start=1):
+        if not row or not any(field.strip() for field in row):
+            continue
+        if line_number == 1 and [field.strip().lower() for field in row[:2]] == ['name', 'number']:
+            continue
+        name = row[0].strip()
+        number = row[1].strip() if len(row) > 1 else ''
+        yield line_number, name, number
+
+@timed_db_operation('import')
+def import_batch(batch, upsert):
+    """Write one validated batch in a single transaction. Returns (inserted, updated, errors)"""
+    rows = [(normalize_name(name), number) for _, name, number in batch]
+    inserted, updated, duplicates = phonebook_state('storage').bulk_save(rows, upsert)
+    errors = [
+        {'line': line_number, 'name': name, 'error': f'Person with name {name.title()} already exists.'}
+        for (line_number, name, _), (name_key, _) in zip(batch, rows)
+        if name_key in duplicates
+    ]
+    return inserted, updated, errors
+
+def import_persons(lines, batch_size=None, upsert=False):
+    """Import persons from CSV lines (name,number) in batched transactions.
+
+    Rows are parsed incrementally, validated with validate_input and
+    written batch_size rows at a time. Returns a report with counts and
+    per-row errors.
+    """
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    report = {'inserted': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+    def record_error(line_number, name, message):
+        report['failed'] += 1
+        if len(report['errors']) < IMPORT_MAX_ERRORS:
+            report['errors'].append({'line': line_number, 'name': name, 'error': message})
+
+    def flush(batch):
+        try:
+            inserted, updated, errors = import_batch(batch, upsert)
+        except StorageUnavailable:
+            raise
+        except Exception as e:
+            logger.error(f"Error importing batch: {e}")
+            for line_number, name, _ in batch:
+                record_error(line_number, name, 'Failed to add person to database')
+            return
+        report['inserted'] += inserted
+        report['updated'] += updated
+        for error in errors:
+            record_error(error['line'], error['name'], error['error'])
+
+    try:
+        batch = []
+        seen = set()
+        for line_number, name, number in read_import_rows(lines):
+            is_valid, message = validate_input(name, number)
+            if not is_valid:
+                record_error(line_number, name, message)
+                continue
+            name_key = normalize_name(name)
+            if name_key in seen:
+                # A later row in the same batch would hit the unique index
+                flush(batch)
+                batch, seen = [], set()
+            batch.append((line_number, name, number))
+            seen.add(name_key)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch, seen = [], set()
+        if batch:
+            flush(batch)
+    except StorageUnavailable:
+        report['error'] = 'Database connection failed'
+        return report
+    finally:
+        phonebook_state('search_cache').clear()
+        if report['inserted']:
+            phonebook_state('autocomplete').invalidate()
+        if report['inserted'] or report['updated']:
+            issue_consistency_token()
+
+    report['errors_truncated'] = report['failed'] > len(report['errors'])
+    return report
+
+EXPORT_CHUNK_ROWS = 500
+
+def vcard_escape(value):
+    """Escape a vCard text value"""
+    return value.replace('\\', '\\\\').replace(',', '\\,').replace(';', '\\;').replace('\n', '\\n')
+
+def format_export_rows(persons, export_format):
+    """Render a chunk of person dicts in the requested export format"""
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for person in persons:
+            writer.writerow([person['name'], person['number']])
+        return buffer.getvalue()
+    if export_format == 'jsonl':
+        return ''.join(json.dumps(person, ensure_ascii=False, separators=(',', ':')) + '\n' for person in persons)
+    # vCard 3.0 requires N; the whole name goes in its given-name field
+    return ''.join(
+        f"BEGIN:VCARD\r\nVERSION:3.0\r\nN:;{vcard_escape(person['name'])};;;\r\n"
+        f"FN:{vcard_escape(person['name'])}\r\nTEL;TYPE=CELL:{vcard_escape(person['number'])}\r\nEND:VCARD\r\n"
+        for person in persons
+    )
+
+def iter_all_rows():
+    """Return a stream of every backend row, or None if the database is unavailable.
+
+    Rows are streamed from the backend as they are consumed (MySQL uses an
+    unbuffered server-side cursor), so memory use stays bounded regardless
+    of table size. The backend is reached up front so callers can report
+    an outage before they start streaming. The stream may hold a pooled
+    connection, so callers must pass it to close_rows() when done, even if
+    they never read from it.
+    """
+    try:
+        return phonebook_state('storage').iter_rows()
+    except StorageUnavailable:
+        return None
+
+def close_rows(rows):
+    """Close a row stream from iter_all_rows, returning its connection"""
+    close = getattr(rows, 'close', None)
+    if close is not None:
+        close()
+
+def stream_persons(rows):
+    """Yield persons from backend rows, closing the row stream when abandoned"""
+    try:
+        for row in rows:
+            yield person_from_row(row)
+    finally:
+        close_rows(rows)
+
+def export_persons(persons, export_format):
+    """Yield persons as text chunks in csv, jsonl or vcard format"""
+    if export_format == 'csv':
+        yield 'name,number\r\n'
+    chunk = []
+    for person in persons:
+        chunk.append(person)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield format_export_rows(chunk, export_format)
+            chunk = []
+    if chunk:
+        yield format_export_rows(chunk, export_format)
+
+def static_page(template, **context):
+    """Serve a page that depends only on its arguments from the page cache.
+
+    The body is rendered once per process and served with a strong ETag,
+    so conditional requests get a 304 without touching Jinja. In debug
+    mode templates may change at any time, so pages are always rendered.
+    """
+    def render():
+        return render_template(template, **context)
+
+    if current_app.debug:
+        body = render().encode('utf-8')
+        etag = hashlib.sha256(body).hexdigest()[:32]
+    else:
+        key = (template, tuple(sorted(context.items())))
+        body, etag = phonebook_state('page_cache').get(key, render)
+
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['PAGE_CACHE_MAX_AGE']}"
+    return response.make_conditional(request)
+
+@phonebook.route('/', methods=['GET', 'POST'])
 def find_records():
     """Find records by keyword"""
     if request.method == 'POST':
@@ -228,17 +836,20 @@ def find_records():
             flash('Please enter a search term', 'error')
             return render_template('index.html', show_result=False, developer_name='Ismail')
         
-        persons_app = find_persons(keyword)
-        return render_template('index.html', persons_html=persons_app, keyword=keyword, show_result=True, developer_name='Ismail')
+        cursor = request.form.get('cursor') or None
+        fuzzy = request.form.get('fuzzy') == 'on'
+        persons_app, next_cursor = find_persons(keyword, cursor=cursor, consistency=request_consistency(), fuzzy=fuzzy)
+        return render_template('index.html', persons_html=persons_app, keyword=keyword, next_cursor=next_cursor, fuzzy=fuzzy, show_result=True, developer_name='Ismail')
     else:
-        return render_template('index.html', show_result=False, developer_name='Ismail')
+        return static_page('index.html', show_result=False, developer_name='Ismail')
 
-@app.route('/add', methods=['GET', 'POST'])
+@phonebook.route('/add', methods=['GET', 'POST'])
 def add_record():
     """Add new record"""
     if request.method == 'POST':
         name = request.form.get('username', '').strip()
         phone_number = request.form.get('phonenumber', '').strip()
+        upsert = request.form.get('upsert') == 'on'
         
         # Validate input
         is_valid, message = validate_input(name, phone_number)
@@ -250,7 +861,7 @@ def add_record():
                                 action_name='save', 
                                 developer_name='Ismail')
         
-        result_app = insert_person(name, phone_number)
+        result_app = insert_person(name, phone_number, upsert=upsert)
         return render_template('add-update.html', 
                             show_result=True, 
                             result_html=result_app, 
@@ -258,13 +869,13 @@ def add_record():
                             action_name='save', 
                             developer_name='Ismail')
     else:
-        return render_template('add-update.html', 
-                            show_result=False, 
-                            not_valid=False, 
-                            action_name='save', 
-                            developer_name='Ismail')
+        return static_page('add-update.html', 
+                           show_result=False, 
+                           not_valid=False, 
+                           action_name='save', 
+                           developer_name='Ismail')
 
-@app.route('/update', methods=['GET', 'POST'])
+@phonebook.route('/update', methods=['GET', 'POST'])
 def update_record():
     """Update existing record"""
     if request.method == 'POST':
@@ -289,13 +900,13 @@ def update_record():
                             action_name='update', 
                             developer_name='Ismail')
     else:
-        return render_template('add-update.html', 
-                            show_result=False, 
-                            not_valid=False, 
-                            action_name='update', 
-                            developer_name='Ismail')
+        return static_page('add-update.html', 
+                           show_result=False, 
+                           not_valid=False, 
+                           action_name='update', 
+                           developer_name='Ismail')
 
-@app.route('/delete', methods=['GET', 'POST'])
+@phonebook.route('/delete', methods=['GET', 'POST'])
 def delete_record():
     """Delete record"""
     if request.method == 'POST':
@@ -317,25 +928,314 @@ def delete_record():
                             not_valid=False, 
                             developer_name='Ismail')
     else:
-        return render_template('delete.html', 
-                            show_result=False, 
-                            not_valid=False, 
-                            developer_name='Ismail')
+        return static_page('delete.html', 
+                           show_result=False, 
+                           not_valid=False, 
+                           developer_name='Ismail')
+
+@phonebook.route('/lookup', methods=['GET', 'POST'])
+def lookup_records():
+    """Find who owns a phone number, or every number with a prefix"""
+    if request.method == 'POST':
+        number = request.form.get('phonenumber', '').strip()
+        prefix = request.form.get('prefix') == 'on'
+
+        is_valid, message = validate_number_query(number)
+        if not is_valid:
+            return render_template('lookup.html', not_valid=True, message=message, prefix=prefix,
+                                   show_result=False, developer_name='Ismail')
+
+        cursor = request.form.get('cursor') or None
+        persons_app, next_cursor = find_persons_by_number(number, prefix, cursor=cursor, consistency=request_consistency())
+        return render_template('lookup.html', persons_html=persons_app, number=number, prefix=prefix,
+                               next_cursor=next_cursor, not_valid=False, show_result=True, developer_name='Ismail')
+    else:
+        return static_page('lookup.html', show_result=False, not_valid=False, prefix=False, developer_name='Ismail')
+
+# JSON API for programmatic clients; shares the data functions with the
+# HTML routes but never renders templates
+API_MAX_LIMIT = 200
+
+API_STATUS_CODES = {
+    FOUND: 200,
+    CREATED: 201,
+    UPDATED: 200,
+    DELETED: 204,
+    EXISTS: 409,
+    NOT_FOUND: 404,
+    UNAVAILABLE: 503,
+    FAILED: 500,
+}
+
+def api_error(status, message):
+    """Build a JSON error response for a data function outcome"""
+    return jsonify({'error': message}), API_STATUS_CODES[status]
+
+def api_payload():
+    """Return the JSON request body as a dict of strings"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return {}
+    return {key: value.strip() if isinstance(value, str) else value for key, value in payload.items()}
+
+@phonebook.route('/api/v1/persons', methods=['GET'])
+def api_search_persons():
+    """Search persons by keyword: ?q=<keyword>&limit=<n>&cursor=<next>&fuzzy=<true|false>"""
+    keyword = request.args.get('q', '').strip()
+    if not keyword:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    limit = request.args.get('limit', current_app.config['SEARCH_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, API_MAX_LIMIT))
+
+    if request.args.get('fuzzy', '').lower() in ('1', 'true', 'yes'):
+        status, persons = fuzzy_search_persons(keyword, limit, request_consistency())
+        next_cursor = None
+    else:
+        status, persons, next_cursor = search_persons(keyword, limit, request.args.get('cursor'), request_consistency())
+    if status != FOUND:
+        return api_error(status, 'Search failed')
+    return jsonify({'persons': persons, 'next': next_cursor})
+
+@phonebook.route('/api/v1/persons/autocomplete', methods=['GET'])
+def api_autocomplete_persons():
+    """Names starting with a prefix, from the in-memory index: ?q=<prefix>&limit=<n>"""
+    prefix = normalize_name(request.args.get('q', ''))
+    if not prefix:
+        return jsonify({'names': []})
+    limit = request.args.get('limit', current_app.config['AUTOCOMPLETE_LIMIT'], type=int)
+    limit = max(1, min(limit, API_MAX_LIMIT))
+
+    try:
+        name_keys = phonebook_state('autocomplete').complete(prefix, limit)
+    except StorageUnavailable:
+        return api_error(UNAVAILABLE, 'Autocomplete index is not available')
+    except Exception as e:
+        logger.error(f"Error in api_autocomplete_persons: {e}")
+        return api_error(FAILED, 'Autocomplete failed')
+    return jsonify({'names': [name_key.strip().title() for name_key in name_keys]})
+
+@phonebook.route('/api/v1/persons/by-number', methods=['GET'])
+def api_search_persons_by_number():
+    """Reverse lookup: ?number=<digits>&prefix=<true|false>&limit=<n>&cursor=<next>"""
+    number = request.args.get('number', '').strip()
+    is_valid, message = validate_number_query(number)
+    if not is_valid:
+        return jsonify({'error': message}), 400
+    prefix = request.args.get('prefix', '').lower() in ('1', 'true', 'yes')
+    limit = request.args.get('limit', current_app.config['SEARCH_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, API_MAX_LIMIT))
+
+    status, persons, next_cursor = search_persons_by_number(number, prefix, limit, request.args.get('cursor'),
+                                                            request_consistency())
+    if status != FOUND:
+        return api_error(status, 'Lookup failed')
+    return jsonify({'persons': persons, 'next': next_cursor})
+
+@phonebook.route('/api/v1/persons/<name>', methods=['GET'])
+def api_get_person(name):
+    """Get a single person by exact name"""
+    status, person = get_person(name)
+    if status == NOT_FOUND:
+        return api_error(status, f'Person with name {name.strip().title()} does not exist.')
+    if status != FOUND:
+        return api_error(status, 'Lookup failed')
+    return jsonify(person)
+
+@phonebook.route('/api/v1/persons', methods=['POST'])
+def api_create_person():
+    """Create a person from {"name": ..., "number": ..., "upsert": false}"""
+    payload = api_payload()
+    name, number = payload.get('name'), payload.get('number')
+    if not isinstance(name, str) or not isinstance(number, str):
+        return jsonify({'error': 'name and number must be strings'}), 400
+    is_valid, message = validate_input(name, number)
+    if not is_valid:
+        return jsonify({'error': message}), 400
 
-@app.errorhandler(404)
+    status = save_person(name, number, upsert=payload.get('upsert') is True)
+    message = INSERT_MESSAGES[status].format(name=name.title())
+    if status not in (CREATED, UPDATED):
+        return api_error(status, message)
+    return jsonify({'status': status, 'message': message}), API_STATUS_CODES[status]
+
+@phonebook.route('/api/v1/persons/<name>', methods=['PUT'])
+def api_update_person(name):
+    """Update a person's number from {"number": ...}"""
+    number = api_payload().get('number')
+    if not isinstance(number, str):
+        return jsonify({'error': 'number must be a string'}), 400
+    is_valid, message = validate_input(name, number)
+    if not is_valid:
+        return jsonify({'error': message}), 400
+
+    status = change_person(name, number)
+    message = UPDATE_MESSAGES[status].format(name=name.strip().title())
+    if status != UPDATED:
+        return api_error(status, message)
+    return jsonify({'status': status, 'message': message})
+
+@phonebook.route('/api/v1/persons/<name>', methods=['DELETE'])
+def api_delete_person(name):
+    """Delete a person by exact name"""
+    is_valid, message = validate_input(name)
+    if not is_valid:
+        return jsonify({'error': message}), 400
+
+    status = remove_person(name)
+    if status != DELETED:
+        return api_error(status, DELETE_MESSAGES[status].format(name=name.strip().title()))
+    return '', API_STATUS_CODES[DELETED]
+
+@phonebook.route('/api/v1/persons/import', methods=['POST'])
+def api_import_persons():
+    """Bulk import a name,number CSV sent as the request body or as a 'file' upload"""
+    upload = request.files.get('file')
+    stream = upload.stream if upload is not None else request.stream
+    batch_size = request.args.get('batch_size', current_app.config['IMPORT_BATCH_SIZE'], type=int)
+    upsert = request.args.get('upsert', '').lower() in ('1', 'true', 'yes')
+
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    report = import_persons(lines, batch_size=max(1, batch_size), upsert=upsert)
+    if 'error' in report:
+        return jsonify(report), API_STATUS_CODES[UNAVAILABLE]
+    return jsonify(report)
+
+@phonebook.cli.command('import-csv')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Rows per transaction')
+@click.option('--upsert', is_flag=True, help='Overwrite numbers of existing names')
+def import_csv_command(path, batch_size, upsert):
+    """Bulk import a name,number CSV file into the phonebook"""
+    with open(path, encoding='utf-8-sig', newline='') as lines:
+        report = import_persons(lines, batch_size=batch_size, upsert=upsert)
+    click.echo(json.dumps(report, indent=2))
+
+@phonebook.route('/api/v1/persons/export', methods=['GET'])
+def api_export_persons():
+    """Stream the whole phonebook as ?format=csv (default), jsonl or vcard"""
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    rows = iter_all_rows()
+    if rows is None:
+        return api_error(UNAVAILABLE, 'Database connection failed')
+
+    mimetype, filename = EXPORT_FORMATS[export_format]
+    response = Response(
+        stream_with_context(export_persons(stream_persons(rows), export_format)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
+    # Generators that never started ignore close(), so a HEAD request or a
+    # client gone before the first chunk would otherwise keep the connection
+    response.call_on_close(functools.partial(close_rows, rows))
+    return response
+
+@phonebook.cli.command('export')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Output file (default: stdout)')
+def export_command(export_format, output):
+    """Stream every contact as CSV, JSON Lines or vCard"""
+    rows = iter_all_rows()
+    if rows is None:
+        raise click.ClickException('Database connection failed')
+    try:
+        for chunk in export_persons(stream_persons(rows), export_format):
+            output.write(chunk)
+    finally:
+        close_rows(rows)
+
+@phonebook.cli.command('generate-dataset')
+@click.option('--size', type=int, default=10000, help='Distinct contacts to create (default: 10000)')
+@click.option('--seed', type=int, default=0, help='Random seed; the same seed gives the same contacts')
+@click.option('--batch-size', type=int, default=10000, help='Rows per bulk write')
+@click.option('--case-duplicate-rate', type=float, default=0.01, help='Share of extra rows that differ only by case')
+def generate_dataset_command(size, seed, batch_size, case_duplicate_rate):
+    """Fill the configured storage backend with a synthetic phonebook"""
+    storage = phonebook_state('storage')
+    storage.init_schema()
+    report = load_dataset(storage, size, seed=seed, batch_size=batch_size, case_duplicate_rate=case_duplicate_rate)
+    click.echo(json.dumps(report, indent=2))
+
+def metrics_endpoint():
+    """Endpoint name without the blueprint prefix, for metric labels"""
+    return (request.endpoint or 'unmatched').rsplit('.', 1)[-1]
+
+@phonebook.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    phonebook_state('metrics')['in_flight'].inc((metrics_endpoint(),))
+
+@phonebook.after_app_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        labels = (metrics_endpoint(), request.method, str(response.status_code))
+        state = phonebook_state('metrics')
+        state['requests'].inc(labels)
+        state['latency'].observe(labels, elapsed)
+
+        # Report DB round trips and time so N+1 patterns show up per request
+        db_stats = request_db_stats()
+        state['db_round_trips'].observe((metrics_endpoint(),), db_stats.round_trips)
+        response.headers['Server-Timing'] = server_timing_header(db_stats, elapsed)
+    return response
+
+@phonebook.after_app_request
+def send_consistency_token(response):
+    """Return the token of this request's write; API clients echo the header
+    and browsers send the cookie with their next search"""
+    token = g.get('consistency_token')
+    if token is not None:
+        response.headers[CONSISTENCY_HEADER] = token
+        response.set_cookie(CONSISTENCY_COOKIE, token, max_age=current_app.config['CONSISTENCY_TOKEN_TTL'],
+                            httponly=True, samesite='Lax')
+    return response
+
+@phonebook.teardown_app_request
+def finish_request_timer(error):
+    if g.get('request_started') is not None:
+        phonebook_state('metrics')['in_flight'].dec((metrics_endpoint(),))
+
+@phonebook.route('/metrics', methods=['GET'])
+def metrics_page():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(phonebook_state('metrics')['registry'].render(), mimetype='text/plain; version=0.0.4')
+
+@phonebook.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Search cache, page cache and autocomplete index counters for this worker"""
+    stats = phonebook_state('search_cache').stats()
+    stats['pages'] = phonebook_state('page_cache').stats()
+    stats['autocomplete'] = phonebook_state('autocomplete').stats()
+    return jsonify(stats)
+
+@phonebook.app_errorhandler(404)
 def not_found(error):
     return render_template('index.html', show_result=False, developer_name='Ismail'), 404
 
-@app.errorhandler(500)
+@phonebook.app_errorhandler(500)
 def internal_error(error):
     return render_template('index.html', show_result=False, developer_name='Ismail'), 500
 
+@phonebook.cli.command('init-db')
+def init_db_command():
+    """Create or migrate the phonebook tables"""
+    if not init_phonebook_db():
+        raise click.ClickException('Failed to initialize database')
+    click.echo('Database initialized successfully')
+
 if __name__ == '__main__':
+    app = create_app()
+
     # Initialize database
-    if init_phonebook_db():
-        logger.info("Database initialized successfully")
-    else:
-        logger.error("Failed to initialize database")
+    with app.app_context():
+        if init_phonebook_db():
+            logger.info("Database initialized successfully")
+        else:
+            logger.error("Failed to initialize database")
     
-    # Run application
-    app.run(host='0.0.0.0', port=80, debug=False) 
\ No newline at end of file
+    # Run application (development server; use gunicorn with wsgi.py in production)
+    app.run(host='0.0.0.0', port=80, debug=False)
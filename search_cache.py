@@ -0,0 +1,102 @@
+"""
+In-process LRU cache for search results of the Phonebook App
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from search_index import fold_diacritics, like_matcher
+
+
+class SearchCache:
+    """Size-bounded LRU cache with a TTL, keyed on (keyword, limit, cursor).
+
+    Keywords must already be normalized. A write to a name only changes the
+    results of keywords that match that name, so invalidate() drops exactly
+    those entries and leaves the rest of the cache warm.
+    """
+
+    def __init__(self, max_entries=1024, ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._keywords = {}            # keyword -> set of keys
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entry if full"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._keywords.setdefault(key[0], set()).add(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, name_key):
+        """Drop every cached search whose keyword matches name_key"""
+        # MySQL compares accent-insensitively, so 'simsek' finds 'şimşek';
+        # folding both sides can only invalidate more than needed, never less
+        name_key = fold_diacritics(name_key)
+        with self._lock:
+            # Keywords keep their LIKE wildcards, so match them the way the backend does
+            stale = [keyword for keyword in self._keywords if like_matcher(fold_diacritics(keyword))(name_key)]
+            for keyword in stale:
+                for key in list(self._keywords.get(keyword, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached search"""
+        with self._lock:
+            self._entries.clear()
+            self._keywords.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+            }
+
+    def _remove(self, key):
+        # Caller holds the lock
+        self._entries.pop(key, None)
+        keys = self._keywords.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keywords[key[0]]
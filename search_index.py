@@ -0,0 +1,144 @@
+"""
+Search index helpers for the Phonebook App
+"""
+
+import re
+import unicodedata
+
+TRIGRAM_SIZE = 3
+
+# Letters with no Unicode decomposition that still read as their base letter
+FOLDED_LETTERS = str.maketrans({'ı': 'i', 'ø': 'o', 'ł': 'l', 'đ': 'd', 'ħ': 'h'})
+
+# LIKE wildcards and the escape character cannot be answered from the
+# trigram index, so keywords containing them fall back to a table scan
+LIKE_SPECIAL_CHARS = ('%', '_', '\\')
+
+
+def like_matcher(keyword):
+    """Return a predicate implementing ``name_key LIKE %keyword%`` in Python"""
+    if not any(c in keyword for c in LIKE_SPECIAL_CHARS):
+        return lambda name_key: keyword in name_key
+
+    pattern, escaped = [], False
+    for c in keyword:
+        if escaped:
+            pattern.append(re.escape(c))
+            escaped = False
+        elif c == '\\':
+            escaped = True
+        elif c == '%':
+            pattern.append('.*')
+        elif c == '_':
+            pattern.append('.')
+        else:
+            pattern.append(re.escape(c))
+    regex = re.compile('.*' + ''.join(pattern) + '.*', re.DOTALL)
+    return lambda name_key: regex.fullmatch(name_key) is not None
+
+
+def fold_diacritics(text):
+    """Strip accents, so 'şimşek' and 'simsek' share trigrams.
+
+    Folding maps each character on its own, so the folding of a substring
+    is still a substring of the folded text.
+    """
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).translate(FOLDED_LETTERS)
+
+
+def trigrams(text):
+    """Return the set of overlapping three-character substrings of text,
+    with diacritics folded, plus the padded trigrams of its words"""
+    text = fold_diacritics(text)
+    return {text[i:i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)} | word_trigrams(text)
+
+
+def word_trigrams(text):
+    """Return the trigrams of each word of text padded the way pg_trgm does
+    ("  ali "), with diacritics folded.
+
+    The padding gives every word trigrams for its first letters and its
+    last letters, so a short word with one typo, such as 'aly', still
+    shares some with the word it misspells.
+    """
+    grams = set()
+    for word in fold_diacritics(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + TRIGRAM_SIZE] for i in range(len(padded) - TRIGRAM_SIZE + 1))
+    return grams
+
+
+def query_trigrams(keyword, limit=6):
+    """Return the trigrams used to narrow a substring search, or None if the
+    keyword cannot use the index.
+
+    Every trigram of the keyword must also be a trigram of a matching name,
+    so any subset of them is a valid filter; at most ``limit`` are used,
+    spread across the keyword, to bound the number of joins.
+    """
+    if len(keyword) < TRIGRAM_SIZE or any(c in keyword for c in LIKE_SPECIAL_CHARS):
+        return None
+
+    keyword = fold_diacritics(keyword)
+    grams = list(dict.fromkeys(
+        keyword[i:i + TRIGRAM_SIZE] for i in range(len(keyword) - TRIGRAM_SIZE + 1)
+    ))
+    if len(grams) > limit:
+        step = len(grams) / limit
+        grams = [grams[int(i * step)] for i in range(limit)]
+    return grams
+
+
+def fuzzy_trigrams(keyword, limit=12):
+    """Return the padded word trigrams of keyword used to find fuzzy
+    candidates, or None if it is too short to search for"""
+    if len(keyword) < TRIGRAM_SIZE:
+        return None
+    grams = sorted(word_trigrams(keyword))
+    if len(grams) > limit:
+        step = len(grams) / limit
+        grams = [grams[int(i * step)] for i in range(limit)]
+    return grams
+
+
+def max_edit_distance(keyword):
+    """Typos tolerated for a keyword of this length"""
+    if len(keyword) <= 4:
+        return 1
+    if len(keyword) <= 8:
+        return 2
+    return 3
+
+
+def edit_distance(a, b, max_distance):
+    """Levenshtein distance between a and b, or max_distance + 1 once it is
+    certain to exceed max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+def fuzzy_distance(keyword, name_key, max_distance):
+    """Edit distance between keyword and the closest of name_key or any run
+    of its words as long as the keyword, so 'ylmaz' is one typo away from
+    'mehmet yılmaz'. Diacritics are folded first, as they are for trigrams,
+    so 'hakan simsek' matches 'hakan şimşek' exactly."""
+    keyword, name_key = fold_diacritics(keyword), fold_diacritics(name_key)
+    best = edit_distance(keyword, name_key, max_distance)
+    words, width = name_key.split(), len(keyword.split())
+    for start in range(len(words) - width + 1):
+        if best == 0:
+            break
+        best = min(best, edit_distance(keyword, ' '.join(words[start:start + width]), max_distance))
+    return best
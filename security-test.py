@@ -5,15 +5,105 @@ This script tests for common security vulnerabilities
 """
 
 import requests
+import argparse
 import json
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import urljoin
 
+DEFAULT_WORKERS = 8
+DEFAULT_SUITE_BUDGET = 30.0
+REQUEST_TIMEOUT = 10
+
+# Findings are reported in this order, whatever order the probes finish in
+SUITES = ('SQL Injection', 'XSS', 'Input Validation', 'Authentication Bypass', 'Error Handling')
+
 class SecurityTester:
-    def __init__(self, base_url):
+    def __init__(self, base_url, max_workers=DEFAULT_WORKERS, suite_budget=DEFAULT_SUITE_BUDGET, timeout=REQUEST_TIMEOUT):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.vulnerabilities_found = []
+        self.max_workers = max_workers
+        self.suite_budget = suite_budget
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._findings = []
+        self._incomplete = []
+        self._executor = None
+
+    @property
+    def session(self):
+        """requests.Session is not thread-safe, so each thread gets its own"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    @property
+    def vulnerabilities_found(self):
+        """Findings ordered by suite and payload"""
+        with self._lock:
+            return [message for _, message in sorted(self._findings)]
+
+    @property
+    def incomplete_probes(self):
+        """Probes that did not finish within their suite's time budget"""
+        with self._lock:
+            return [label for _, label in sorted(self._incomplete)]
+
+    def request_timeout(self):
+        """Per-request timeout, shortened so no request outlives its suite budget"""
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return self.timeout
+        return max(0.1, min(self.timeout, deadline - time.monotonic()))
+
+    def run_probes(self, suite, probes):
+        """Run (label, probe) pairs concurrently within the suite time budget.
+
+        Each probe returns a finding message or None and may let request
+        errors propagate. Probes still running when the budget is spent, or
+        whose request timed out, are reported as incomplete; other errors
+        are printed.
+        """
+        suite_index = SUITES.index(suite)
+        deadline = time.monotonic() + self.suite_budget
+        executor = self._executor or ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def run(probe):
+            self._local.deadline = deadline
+            try:
+                return probe()
+            finally:
+                self._local.deadline = None
+
+        futures = {
+            executor.submit(run, probe): (index, label)
+            for index, (label, probe) in enumerate(probes)
+        }
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+
+        with self._lock:
+            for future in not_done:
+                future.cancel()
+                index, label = futures[future]
+                self._incomplete.append(((suite_index, index), f"{suite}: {label}"))
+            for future in done:
+                index, label = futures[future]
+                try:
+                    finding = future.result()
+                except requests.exceptions.Timeout:
+                    self._incomplete.append(((suite_index, index), f"{suite}: {label}"))
+                    continue
+                except Exception as e:
+                    print(f"Error testing {suite} probe '{label}': {e}")
+                    continue
+                if finding:
+                    self._findings.append(((suite_index, index), finding))
+
+        if executor is not self._executor:
+            executor.shutdown(wait=False, cancel_futures=True)
         
     def test_sql_injection(self):
         """Test for SQL injection vulnerabilities"""
@@ -29,41 +119,44 @@ class SecurityTester:
             "'; SELECT SLEEP(5); --"
         ]
         
-        for payload in sql_payloads:
+        def test_search(payload):
+            timeout = self.request_timeout()
             try:
                 # Test search functionality
                 response = self.session.post(
                     urljoin(self.base_url, '/'),
                     data={'username': payload},
-                    timeout=10
+                    timeout=timeout
                 )
                 
                 # Check if the response indicates SQL injection
                 if response.status_code == 500:
-                    self.vulnerabilities_found.append(f"SQL Injection: Server error with payload '{payload}'")
+                    return f"SQL Injection: Server error with payload '{payload}'"
                 elif "mysql" in response.text.lower() or "sql" in response.text.lower():
-                    self.vulnerabilities_found.append(f"SQL Injection: SQL error message found with payload '{payload}'")
+                    return f"SQL Injection: SQL error message found with payload '{payload}'"
                 elif response.elapsed.total_seconds() > 4:  # Time-based injection
-                    self.vulnerabilities_found.append(f"SQL Injection: Time-based injection possible with payload '{payload}'")
+                    return f"SQL Injection: Time-based injection possible with payload '{payload}'"
                     
             except requests.exceptions.Timeout:
-                self.vulnerabilities_found.append(f"SQL Injection: Timeout with payload '{payload}' (possible time-based injection)")
-            except Exception as e:
-                print(f"Error testing payload '{payload}': {e}")
+                if timeout < self.timeout:
+                    # Cut short by the suite budget, not evidence of injection
+                    raise
+                return f"SQL Injection: Timeout with payload '{payload}' (possible time-based injection)"
         
-        # Test add functionality
-        try:
+        def test_add():
             response = self.session.post(
                 urljoin(self.base_url, '/add'),
                 data={'username': "'; DROP TABLE phonebook; --", 'phonenumber': '1234567890'},
-                timeout=10
+                timeout=self.request_timeout()
             )
-            
+
             if response.status_code == 500:
-                self.vulnerabilities_found.append("SQL Injection: Add functionality vulnerable")
-                
-        except Exception as e:
-            print(f"Error testing add functionality: {e}")
+                return "SQL Injection: Add functionality vulnerable"
+
+        probes = [(payload, lambda payload=payload: test_search(payload)) for payload in sql_payloads]
+        # Test add functionality
+        probes.append(('add', test_add))
+        self.run_probes('SQL Injection', probes)
     
     def test_xss(self):
         """Test for XSS vulnerabilities"""
@@ -77,52 +170,46 @@ class SecurityTester:
             "'\"><script>alert('XSS')</script>"
         ]
         
-        for payload in xss_payloads:
-            try:
-                response = self.session.post(
-                    urljoin(self.base_url, '/'),
-                    data={'username': payload},
-                    timeout=10
-                )
-                
-                if payload in response.text:
-                    self.vulnerabilities_found.append(f"XSS: Payload '{payload}' reflected in response")
-                    
-            except Exception as e:
-                print(f"Error testing XSS payload '{payload}': {e}")
+        def test_payload(payload):
+            response = self.session.post(
+                urljoin(self.base_url, '/'),
+                data={'username': payload},
+                timeout=self.request_timeout()
+            )
+
+            if payload in response.text:
+                return f"XSS: Payload '{payload}' reflected in response"
+
+        self.run_probes('XSS', [(payload, lambda payload=payload: test_payload(payload)) for payload in xss_payloads])
     
     def test_input_validation(self):
         """Test input validation"""
         print("🔍 Testing input validation...")
         
         # Test empty inputs
-        try:
+        def test_empty():
             response = self.session.post(
                 urljoin(self.base_url, '/'),
                 data={'username': ''},
-                timeout=10
+                timeout=self.request_timeout()
             )
-            
+
             if response.status_code == 200 and "error" not in response.text.lower():
-                self.vulnerabilities_found.append("Input Validation: Empty username accepted without validation")
-                
-        except Exception as e:
-            print(f"Error testing empty input: {e}")
+                return "Input Validation: Empty username accepted without validation"
         
         # Test very long inputs
-        long_input = "A" * 1000
-        try:
+        def test_long():
+            long_input = "A" * 1000
             response = self.session.post(
                 urljoin(self.base_url, '/'),
                 data={'username': long_input},
-                timeout=10
+                timeout=self.request_timeout()
             )
-            
+
             if response.status_code == 200:
-                self.vulnerabilities_found.append("Input Validation: Very long input accepted (potential DoS)")
-                
-        except Exception as e:
-            print(f"Error testing long input: {e}")
+                return "Input Validation: Very long input accepted (potential DoS)"
+
+        self.run_probes('Input Validation', [('empty input', test_empty), ('long input', test_long)])
     
     def test_authentication_bypass(self):
         """Test for authentication bypass vulnerabilities"""
@@ -131,76 +218,107 @@ class SecurityTester:
         # Test if we can access admin-like endpoints
         admin_endpoints = ['/admin', '/config', '/debug', '/internal', '/api/users']
         
-        for endpoint in admin_endpoints:
-            try:
-                response = self.session.get(
-                    urljoin(self.base_url, endpoint),
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    self.vulnerabilities_found.append(f"Authentication Bypass: Endpoint {endpoint} accessible without authentication")
-                    
-            except Exception as e:
-                print(f"Error testing endpoint {endpoint}: {e}")
+        def test_endpoint(endpoint):
+            response = self.session.get(
+                urljoin(self.base_url, endpoint),
+                timeout=self.request_timeout()
+            )
+
+            if response.status_code == 200:
+                return f"Authentication Bypass: Endpoint {endpoint} accessible without authentication"
+
+        self.run_probes(
+            'Authentication Bypass',
+            [(endpoint, lambda endpoint=endpoint: test_endpoint(endpoint)) for endpoint in admin_endpoints]
+        )
     
     def test_error_handling(self):
         """Test error handling and information disclosure"""
         print("🔍 Testing error handling...")
         
         # Test for information disclosure in errors
-        try:
+        def test_not_found():
             response = self.session.get(
                 urljoin(self.base_url, '/nonexistent'),
-                timeout=10
+                timeout=self.request_timeout()
             )
-            
+
             if response.status_code == 500:
-                self.vulnerabilities_found.append("Error Handling: Internal server error exposed")
+                return "Error Handling: Internal server error exposed"
             elif "stack trace" in response.text.lower() or "exception" in response.text.lower():
-                self.vulnerabilities_found.append("Error Handling: Stack trace or exception details exposed")
-                
-        except Exception as e:
-            print(f"Error testing error handling: {e}")
+                return "Error Handling: Stack trace or exception details exposed"
+
+        self.run_probes('Error Handling', [('/nonexistent', test_not_found)])
     
     def run_all_tests(self):
-        """Run all security tests"""
+        """Run all security tests concurrently on a shared, bounded worker pool"""
         print("🚀 Starting security testing...")
         print(f"Target URL: {self.base_url}")
+        print(f"Workers: {self.max_workers}  Budget: {self.suite_budget:g}s per suite")
         print("-" * 50)
         
-        self.test_sql_injection()
-        self.test_xss()
-        self.test_input_validation()
-        self.test_authentication_bypass()
-        self.test_error_handling()
+        suites = [
+            self.test_sql_injection,
+            self.test_xss,
+            self.test_input_validation,
+            self.test_authentication_bypass,
+            self.test_error_handling,
+        ]
+
+        start = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='probe')
+        try:
+            # Suite threads only submit probes and wait, so they get their
+            # own pool; requests in flight are bounded by max_workers
+            with ThreadPoolExecutor(max_workers=len(suites), thread_name_prefix='suite') as suite_pool:
+                for future in [suite_pool.submit(suite) for suite in suites]:
+                    future.result()
+        finally:
+            # Abandoned probes end on their own once their request timeout expires
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
         
         print("-" * 50)
-        self.print_results()
+        print(f"⏱️ Completed in {time.monotonic() - start:.1f}s")
+        return self.print_results()
     
     def print_results(self):
         """Print test results"""
-        if not self.vulnerabilities_found:
+        vulnerabilities = self.vulnerabilities_found
+        incomplete = self.incomplete_probes
+
+        if not vulnerabilities:
             print("✅ No security vulnerabilities detected!")
-            print("🎉 Your application appears to be secure against common attacks.")
+            if not incomplete:
+                print("🎉 Your application appears to be secure against common attacks.")
         else:
-            print(f"❌ {len(self.vulnerabilities_found)} security vulnerabilities found:")
-            for i, vuln in enumerate(self.vulnerabilities_found, 1):
+            print(f"❌ {len(vulnerabilities)} security vulnerabilities found:")
+            for i, vuln in enumerate(vulnerabilities, 1):
                 print(f"  {i}. {vuln}")
             print("\n🚨 Immediate action required to fix these vulnerabilities!")
         
-        return len(self.vulnerabilities_found) == 0
+        if incomplete:
+            # An unfinished scan must not pass a deploy gate
+            print(f"⚠️ {len(incomplete)} probes did not finish within the time budget:")
+            for label in incomplete:
+                print(f"  - {label}")
+
+        return not vulnerabilities and not incomplete
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python security-test.py <base_url>")
-        print("Example: python security-test.py http://localhost:5000")
-        sys.exit(1)
-    
-    base_url = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Security test the Phonebook App')
+    parser.add_argument('base_url', help='Example: http://localhost:5000')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Concurrent requests (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--budget', type=float, default=DEFAULT_SUITE_BUDGET,
+                        help=f'Seconds allowed per test suite (default: {DEFAULT_SUITE_BUDGET:g})')
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT,
+                        help=f'Per-request timeout in seconds (default: {REQUEST_TIMEOUT})')
+    args = parser.parse_args()
     
     try:
-        tester = SecurityTester(base_url)
+        tester = SecurityTester(args.base_url, max_workers=args.workers,
+                                suite_budget=args.budget, timeout=args.timeout)
         is_secure = tester.run_all_tests()
         
         if is_secure:
@@ -216,4 +334,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
@@ -0,0 +1,224 @@
+"""
+Cached, background-refreshed SSM parameter loading for the Phonebook App
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialError(Exception):
+    """Raised when parameters cannot be retrieved"""
+
+
+class SSMParameterSource:
+    """Fetch parameters from AWS SSM Parameter Store in one batched call"""
+
+    def __init__(self, region=None):
+        self.region = region or os.getenv('AWS_REGION', 'us-east-1')
+        self._client = None
+
+    def fetch(self, names):
+        if self._client is None:
+            # boto3 is slow to import, so only pay for it when SSM is used
+            import boto3
+            self._client = boto3.client('ssm', region_name=self.region)
+
+        response = self._client.get_parameters(Names=list(names), WithDecryption=True)
+        if response.get('InvalidParameters'):
+            raise CredentialError(f"Unknown SSM parameters: {', '.join(response['InvalidParameters'])}")
+        return {parameter['Name']: parameter['Value'] for parameter in response['Parameters']}
+
+
+class LocalParameterSource:
+    """In-memory stand-in for SSM, for tests and local development"""
+
+    def __init__(self, values):
+        self.values = dict(values)
+
+    @classmethod
+    def from_file(cls, path):
+        """Load parameters from a JSON object mapping names to values"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def fetch(self, names):
+        missing = [name for name in names if name not in self.values]
+        if missing:
+            raise CredentialError(f"Unknown parameters: {', '.join(missing)}")
+        return {name: self.values[name] for name in names}
+
+
+class CredentialProvider:
+    """Serve parameters from memory, refreshing them from a source.
+
+    Values are cached for ``ttl`` seconds. A stale value is still returned
+    while a background refresh runs, so rotated secrets are picked up
+    without blocking requests. Nothing is fetched until the first get() or
+    start(); after the first successful get() a periodic refresher keeps
+    the values current. When ``cache_path`` is set, values are also
+    persisted to that file with 0600 permissions, reused on the next start
+    and shared by every process on the host: a refresh adopts values that
+    another process saved recently instead of calling the source. Refresh
+    times are spread by up to ``jitter`` of the interval so workers started
+    together do not call the source together. ``on_refresh`` callbacks
+    receive the new values.
+    """
+
+    def __init__(self, source, names, ttl=300.0, cache_path=None, jitter=0.2):
+        self.source = source
+        self.names = list(names)
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.jitter = jitter
+        self.on_refresh = []
+
+        self._values = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self):
+        """Return the current values, fetching them only if none are known"""
+        with self._lock:
+            values, fetched_at = self._values, self._fetched_at
+
+        if values is None:
+            with self._fetch_lock:
+                if self._values is None and not self._load_cache_file():
+                    self.refresh()
+            with self._lock:
+                values, fetched_at = self._values, self._fetched_at
+
+        if self._thread is None:
+            self.start()
+        if time.time() - fetched_at > self.ttl:
+            self.refresh_async()
+        return values
+
+    def refresh(self):
+        """Fetch fresh values from the source and publish them"""
+        values = self.source.fetch(self.names)
+        self._publish(values, time.time())
+        self._save_cache_file(values)
+        logger.info("Refreshed credentials from parameter source")
+        return values
+
+    def refresh_async(self):
+        """Refresh in a background thread unless a refresh is already running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh_shared(self.ttl / 2)
+            except Exception as e:
+                logger.error(f"Background credential refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='credential-refresh', daemon=True).start()
+
+    def start(self, interval=None):
+        """Refresh in the background once the values are ``interval`` seconds old.
+
+        Values are first taken from the cache file, so a restart with a
+        warm cache does not call the source at all until they are due.
+        Without any values the first refresh is a prefetch, delayed only by
+        jitter.
+        """
+        interval = interval or self.ttl / 2
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            def run():
+                with self._fetch_lock:
+                    if self._values is None:
+                        self._load_cache_file()
+                failed = False
+                while True:
+                    # After a failure wait a whole interval, since the age
+                    # of the values says they are still due
+                    due = interval if failed else max(0.0, interval - self._age())
+                    if self._stop.wait(due + random.uniform(0, self.jitter * interval)):
+                        return
+                    try:
+                        self._refresh_shared(interval)
+                        failed = False
+                    except Exception as e:
+                        logger.error(f"Background credential refresh failed: {e}")
+                        failed = True
+
+            self._thread = threading.Thread(target=run, name='credential-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the periodic refresher started by start()"""
+        self._stop.set()
+
+    def _age(self):
+        with self._lock:
+            if self._values is None:
+                return float('inf')
+            return time.time() - self._fetched_at
+
+    def _refresh_shared(self, max_age):
+        """Adopt values another process saved less than max_age seconds ago,
+        or fetch them from the source"""
+        with self._fetch_lock:
+            if not self._load_cache_file(max_age):
+                self.refresh()
+
+    def _publish(self, values, fetched_at):
+        with self._lock:
+            changed = values != self._values
+            self._values = values
+            self._fetched_at = fetched_at
+        if changed:
+            for callback in self.on_refresh:
+                callback(values)
+
+    def _load_cache_file(self, max_age=None):
+        """Publish the values of the cache file, unless they are older than max_age"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+            values = cached['values']
+            fetched_at = cached.get('fetched_at', 0.0)
+            if any(name not in values for name in self.names):
+                return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable credential cache {self.cache_path}: {e}")
+            return False
+
+        if max_age is not None and time.time() - fetched_at > max_age:
+            return False
+        self._publish(values, fetched_at)
+        logger.info("Loaded credentials from local cache file")
+        return True
+
+    def _save_cache_file(self, values):
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': time.time(), 'values': values}, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to write credential cache {self.cache_path}: {e}")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark for Phonebook App
+Measures import time, create_app() time and time-to-first-request in fresh
+interpreters, and optionally fails when a run regresses against a baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter so nothing is already imported or cached
+CHILD_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import importlib
+phonebook_app = importlib.import_module('phonebook-app-secure')
+imported = time.perf_counter()
+app = phonebook_app.create_app()
+created = time.perf_counter()
+response = app.test_client().get('/')
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    'import_s': imported - start,
+    'create_app_s': created - imported,
+    'first_request_s': served - created,
+    'total_s': served - start,
+}))
+"""
+
+METRICS = ('import_s', 'create_app_s', 'first_request_s', 'total_s')
+
+
+def run_once(env):
+    """Start one interpreter and return its timings"""
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(repeat):
+    """Return the median and minimum of each metric over repeat runs"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        # Local stand-in for SSM so the benchmark never touches the network
+        json.dump({'/ismail/phonebook/username': 'bench', '/ismail/phonebook/password': 'bench'}, f)
+        parameters_path = f.name
+
+    env = dict(os.environ, SSM_LOCAL_PARAMETERS=parameters_path, PYTHONDONTWRITEBYTECODE='1')
+    try:
+        runs = [run_once(env) for _ in range(repeat)]
+    finally:
+        os.unlink(parameters_path)
+
+    return {
+        metric: {
+            'median': statistics.median(run[metric] for run in runs),
+            'min': min(run[metric] for run in runs),
+        }
+        for metric in METRICS
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Return a list of metrics whose median regressed past the threshold"""
+    regressions = []
+    for metric in METRICS:
+        if metric not in baseline:
+            continue
+        before = baseline[metric]['median']
+        after = results[metric]['median']
+        if before > 0 and (after - before) / before > max_regression:
+            regressions.append(f"{metric}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure Phonebook App startup time')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to start (default: 5)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed slowdown of any median as a fraction (default: 0.2)')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.repeat)
+
+    print("🚀 Startup benchmark")
+    print("-" * 50)
+    for metric in METRICS:
+        print(f"  {metric:<16} median {results[metric]['median'] * 1000:8.1f} ms   "
+              f"min {results[metric]['min'] * 1000:8.1f} ms")
+    print("-" * 50)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ Startup regressed by more than {args.max_regression:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("✅ No startup regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1027 @@
+"""
+Storage backends for the Phonebook App
+
+The data functions in phonebook-app-secure.py talk to a backend through
+the small interface of ``Storage``. Names are passed in already
+normalized (the ``name_key``); rows come back as (id, name, number,
+name_key) tuples. Backends keep a digits-only ``number_key`` next to each
+number for reverse lookups. Backends raise ``StorageUnavailable`` when they cannot
+reach their database and ``DuplicateName`` when an insert collides with
+an existing name; any other exception is a failed operation.
+"""
+
+import bisect
+import collections
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+from pymysql.constants.ER import DUP_ENTRY as ER_DUP_ENTRY
+from pymysql.err import IntegrityError
+
+from db_instrumentation import InstrumentedSSCursor, record_round_trip, transaction
+from db_pool import PoolTimeout, ReplicasUnavailable
+from search_index import LIKE_SPECIAL_CHARS, fold_diacritics, like_matcher, query_trigrams, trigrams
+
+logger = logging.getLogger(__name__)
+
+
+class StorageUnavailable(Exception):
+    """Raised when the backend cannot reach its database"""
+
+
+class DuplicateName(Exception):
+    """Raised when inserting a name_key that already exists"""
+
+
+class SchemaMigrationError(Exception):
+    """Raised by init_schema when a table could not be brought up to date"""
+
+
+def normalize_name(name):
+    """Return the lookup key stored in the generated name_key column"""
+    return name.strip().lower()
+
+
+def normalize_number(number):
+    """Return the digits of a phone number as ASCII, the stored number_key"""
+    return ''.join(str(unicodedata.digit(c)) for c in number if c.isdigit())
+
+
+class Storage:
+    """Interface implemented by every storage backend"""
+
+    name = None
+
+    def init_schema(self):
+        """Create or migrate the tables"""
+        raise NotImplementedError
+
+    def search(self, keyword, limit, after=None, min_position=None):
+        """Return up to ``limit`` rows whose name_key contains keyword.
+
+        ``keyword`` is normalized and may contain LIKE wildcards. Rows are
+        ordered by (name_key, id) and start strictly after the ``after``
+        (name_key, id) pair when one is given. Backends that read from
+        replicas only use one that has applied ``min_position``, a value
+        from write_position().
+        """
+        raise NotImplementedError
+
+    def write_position(self):
+        """Return a position that includes every write committed so far, or
+        None when reads are always consistent with writes"""
+        return None
+
+    def search_number(self, number_key, limit, after=None, prefix=False, min_position=None):
+        """Return up to ``limit`` rows whose number_key equals, or with
+        prefix=True starts with, ``number_key``.
+
+        Rows are ordered by (number_key, id) and start strictly after the
+        ``after`` (number_key, id) pair when one is given.
+        """
+        raise NotImplementedError
+
+    def fuzzy_candidates(self, grams, min_shared, length, limit, min_position=None):
+        """Return up to ``limit`` rows whose name_key shares at least
+        ``min_shared`` of the trigrams ``grams``, those sharing most first.
+
+        Ties go to the name_keys whose length is closest to ``length``,
+        the length of the keyword, then to the lowest id.
+        """
+        raise NotImplementedError
+
+    def get(self, name_key):
+        """Return the row for name_key, or None"""
+        raise NotImplementedError
+
+    def save(self, name_key, number, upsert=False):
+        """Insert a person and return True, or with upsert=True overwrite the
+        number of an existing one and return False"""
+        raise NotImplementedError
+
+    def update(self, name_key, number):
+        """Change the number of an existing person. Returns False if there is none"""
+        raise NotImplementedError
+
+    def delete(self, name_key):
+        """Delete a person. Returns False if there is none"""
+        raise NotImplementedError
+
+    def bulk_save(self, rows, upsert=False):
+        """Write (name_key, number) rows, whose keys must be distinct, in one
+        transaction.
+
+        Returns (inserted, updated, duplicates) where duplicates is the set
+        of keys that already existed and were skipped because upsert is off.
+        """
+        raise NotImplementedError
+
+    def iter_rows(self, after_id=0):
+        """Return an iterator over every row with an id above ``after_id``,
+        ordered by id.
+
+        Raises StorageUnavailable immediately, before iteration starts, if
+        the database cannot be reached. Callers that may stop early must
+        call the iterator's close(), if it has one, even when they never
+        started iterating.
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Return backend-specific statistics for /metrics"""
+        return {}
+
+
+def migrate_name_key(cursor):
+    """Add the generated name_key column and its unique index to an existing table"""
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'phonebook' AND COLUMN_NAME = 'name_key'"
+    )
+    if cursor.fetchone()[0] == 0:
+        logger.info("Adding name_key column to phonebook table")
+        cursor.execute(
+            "ALTER TABLE phonebook "
+            "ADD COLUMN name_key VARCHAR(100) AS (LOWER(TRIM(name))) STORED NOT NULL"
+        )
+
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'phonebook' AND INDEX_NAME = 'uq_phonebook_name_key'"
+    )
+    if cursor.fetchone()[0] == 0:
+        # Names that differ only by case or surrounding spaces would make the
+        # ALTER fail with a bare duplicate-key error; list them instead
+        duplicates = find_duplicate_name_keys(cursor)
+        if duplicates:
+            listing = "; ".join(f"{name_key!r} (ids {ids})" for name_key, ids in duplicates[:20])
+            more = f" and {len(duplicates) - 20} more" if len(duplicates) > 20 else ""
+            raise SchemaMigrationError(
+                f"Cannot add unique index on phonebook.name_key, {len(duplicates)} names are stored "
+                f"more than once: {listing}{more}. Merge or delete the extra rows and run init-db again"
+            )
+        logger.info("Adding unique index on phonebook.name_key")
+        cursor.execute("ALTER TABLE phonebook ADD UNIQUE INDEX uq_phonebook_name_key (name_key)")
+
+
+def find_duplicate_name_keys(cursor):
+    """Return [(name_key, 'id,id,...')] for every name_key held by more than one row"""
+    cursor.execute(
+        "SELECT name_key, GROUP_CONCAT(id ORDER BY id) FROM phonebook "
+        "GROUP BY name_key HAVING COUNT(*) > 1 ORDER BY name_key"
+    )
+    return list(cursor.fetchall())
+
+
+def run_migrations(cursor, steps):
+    """Run each (description, step) even if an earlier one fails, then raise
+    SchemaMigrationError naming every failure"""
+    failures = []
+    for description, step in steps:
+        try:
+            step(cursor)
+        except Exception as e:
+            logger.error(f"Schema migration failed ({description}): {e}")
+            failures.append(f"{description}: {e}")
+    if failures:
+        raise SchemaMigrationError("; ".join(failures))
+
+
+# Binary collation, so ':' sorts right after '9' as number_prefix_end expects
+NUMBER_KEY_COLUMN = "number_key VARCHAR(100) CHARACTER SET ascii COLLATE ascii_bin NOT NULL DEFAULT ''"
+
+
+def migrate_number_key(cursor, batch_size=1000):
+    """Add the number_key column and its index to an existing table and fill it in"""
+    cursor.execute(
+        "SELECT COLLATION_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'phonebook' AND COLUMN_NAME = 'number_key'"
+    )
+    column = cursor.fetchone()
+    if column is None:
+        logger.info("Adding number_key column to phonebook table")
+        cursor.execute(f"ALTER TABLE phonebook ADD COLUMN {NUMBER_KEY_COLUMN}")
+    elif column[0] != 'ascii_bin':
+        logger.info(f"Changing phonebook.number_key collation from {column[0]} to ascii_bin")
+        cursor.execute(f"ALTER TABLE phonebook MODIFY COLUMN {NUMBER_KEY_COLUMN}")
+
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'phonebook' AND INDEX_NAME = 'idx_phonebook_number_key'"
+    )
+    if cursor.fetchone()[0] == 0:
+        logger.info("Adding index on phonebook.number_key")
+        cursor.execute("ALTER TABLE phonebook ADD INDEX idx_phonebook_number_key (number_key)")
+
+    cursor.execute("SELECT id, number FROM phonebook WHERE number_key = '' AND number <> ''")
+    missing = [(normalize_number(number), person_id) for person_id, number in cursor.fetchall()]
+    missing = [row for row in missing if row[0]]
+    if missing:
+        logger.info(f"Backfilling number_key for {len(missing)} persons")
+    for start in range(0, len(missing), batch_size):
+        cursor.executemany("UPDATE phonebook SET number_key = %s WHERE id = %s", missing[start:start + batch_size])
+
+
+def index_person_trigrams(cursor, person_id, name_key):
+    """Record the trigrams of a person's name_key in the phonebook_trigram side table"""
+    rows = [(gram, person_id) for gram in trigrams(name_key)]
+    if rows:
+        cursor.executemany(
+            "INSERT IGNORE INTO phonebook_trigram (gram, person_id) VALUES (%s, %s)", rows
+        )
+
+
+# Selects the persons with no padded word trigram ("  a"), who were never
+# indexed or were indexed before word trigrams existed
+UNINDEXED_PERSONS = (
+    "SELECT p.id, p.name_key FROM phonebook p WHERE NOT EXISTS "
+    "(SELECT 1 FROM phonebook_trigram t WHERE t.person_id = p.id AND t.gram LIKE '  %')"
+)
+
+
+def backfill_trigrams(cursor, batch_size=1000):
+    """Index every person that has no trigrams, or no word trigrams, yet"""
+    cursor.execute(UNINDEXED_PERSONS)
+    missing = cursor.fetchall()
+    if missing:
+        logger.info(f"Backfilling trigram index for {len(missing)} persons")
+    for start in range(0, len(missing), batch_size):
+        rows = [(gram, person_id)
+                for person_id, name_key in missing[start:start + batch_size]
+                for gram in trigrams(name_key)]
+        cursor.executemany(
+            "INSERT IGNORE INTO phonebook_trigram (gram, person_id) VALUES (%s, %s)", rows
+        )
+
+
+def build_search_query(keyword, limit, after, placeholder):
+    """Build the trigram-narrowed, keyset-paginated search shared by the SQL backends"""
+    grams = query_trigrams(keyword)
+    if grams is None:
+        # Too short (or contains LIKE wildcards) for the trigram index
+        joins, params = "", []
+    else:
+        # Narrow to ids holding every trigram, then verify with LIKE
+        joins = " ".join(
+            f"JOIN phonebook_trigram t{i} ON t{i}.person_id = p.id AND t{i}.gram = {placeholder}"
+            for i in range(len(grams))
+        )
+        params = list(grams)
+    query = f"SELECT p.id, p.name, p.number, p.name_key FROM phonebook p {joins} WHERE p.name_key LIKE {placeholder}"
+    params.append(f"%{keyword}%")
+    if after is not None:
+        # Keyset pagination: continue strictly after the previous page
+        query += f" AND (p.name_key > {placeholder} OR (p.name_key = {placeholder} AND p.id > {placeholder}))"
+        params.extend([after[0], after[0], after[1]])
+    query += f" ORDER BY p.name_key, p.id LIMIT {placeholder}"
+    params.append(limit)
+    return query, params
+
+
+def build_fuzzy_query(grams, min_shared, length, limit, placeholder, char_length='CHAR_LENGTH'):
+    """Build the trigram-overlap candidate query shared by the SQL backends.
+
+    Only the posting lists of the given trigrams are read from the index,
+    and only ids over the min_shared threshold are joined to the phonebook
+    table, where ties on the shared count are broken by how close the
+    name_key length is to ``length`` rather than by id alone.
+    """
+    placeholders = ", ".join([placeholder] * len(grams))
+    query = (
+        "SELECT p.id, p.name, p.number, p.name_key FROM ("
+        f"SELECT person_id, COUNT(*) AS shared FROM phonebook_trigram WHERE gram IN ({placeholders}) "
+        f"GROUP BY person_id HAVING COUNT(*) >= {placeholder}"
+        ") c JOIN phonebook p ON p.id = c.person_id "
+        f"ORDER BY c.shared DESC, ABS({char_length}(p.name_key) - {placeholder}), p.id LIMIT {placeholder}"
+    )
+    return query, list(grams) + [min_shared, length, limit]
+
+
+def build_number_query(number_key, limit, after, prefix, placeholder):
+    """Build the keyset-paginated reverse lookup shared by the SQL backends"""
+    if prefix:
+        # A range rather than LIKE, so both engines use the number_key index
+        condition = f"p.number_key >= {placeholder} AND p.number_key < {placeholder}"
+        params = [number_key, number_prefix_end(number_key)]
+    else:
+        condition = f"p.number_key = {placeholder}"
+        params = [number_key]
+    query = f"SELECT p.id, p.name, p.number, p.name_key FROM phonebook p WHERE {condition}"
+    if after is not None:
+        query += f" AND (p.number_key > {placeholder} OR (p.number_key = {placeholder} AND p.id > {placeholder}))"
+        params.extend([after[0], after[0], after[1]])
+    query += f" ORDER BY p.number_key, p.id LIMIT {placeholder}"
+    params.append(limit)
+    return query, params
+
+
+def number_prefix_end(number_key):
+    """Smallest key greater than every key starting with number_key.
+
+    Only valid under binary ordering: the successor of '9' is ':'.
+    """
+    return number_key[:-1] + chr(ord(number_key[-1]) + 1)
+
+
+class MySQLStorage(Storage):
+    """MySQL backend using connections from a ConnectionPool.
+
+    With a ReplicaSet, searches are sent to the read replicas and fall back
+    to the primary when none is healthy; every other statement, including
+    the lookups that precede writes, runs on the primary. Write positions
+    are GTID sets, so replicas need gtid_mode=ON for read-your-writes.
+    """
+
+    name = 'mysql'
+
+    def __init__(self, pool, replicas=None, replica_wait_timeout=0.05):
+        self.pool = pool
+        self.replicas = replicas
+        self.replica_wait_timeout = replica_wait_timeout
+
+    def acquire(self):
+        """Borrow a connection from the pool or raise StorageUnavailable"""
+        try:
+            return self.pool.acquire()
+        except PoolTimeout as e:
+            logger.error(f"Database connection pool exhausted: {e}")
+            raise StorageUnavailable(str(e)) from e
+        except Exception as e:
+            logger.error(f"Database connection failed: {e}")
+            raise StorageUnavailable(str(e)) from e
+
+    @contextmanager
+    def cursor(self):
+        """Borrow a connection and yield (connection, cursor), returning both afterwards"""
+        connection = self.acquire()
+        try:
+            cursor = connection.cursor()
+            try:
+                yield connection, cursor
+            finally:
+                cursor.close()
+        finally:
+            self.pool.release(connection)
+
+    def init_schema(self):
+        with self.cursor() as (_, cursor):
+            phonebook_table = f"""
+            CREATE TABLE IF NOT EXISTS ismail_phonebook.phonebook(
+            id INT NOT NULL AUTO_INCREMENT,
+            name VARCHAR(100) NOT NULL,
+            number VARCHAR(100) NOT NULL,
+            name_key VARCHAR(100) AS (LOWER(TRIM(name))) STORED NOT NULL,
+            {NUMBER_KEY_COLUMN},
+            PRIMARY KEY (id),
+            UNIQUE INDEX uq_phonebook_name_key (name_key),
+            INDEX idx_phonebook_number_key (number_key)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+            """
+            cursor.execute(phonebook_table)
+
+            # Trigram side table used to narrow substring searches; rows are
+            # removed together with their person through the foreign key
+            trigram_table = """
+            CREATE TABLE IF NOT EXISTS ismail_phonebook.phonebook_trigram(
+            gram VARCHAR(3) NOT NULL,
+            person_id INT NOT NULL,
+            PRIMARY KEY (gram, person_id),
+            INDEX idx_phonebook_trigram_person (person_id),
+            CONSTRAINT fk_phonebook_trigram_person FOREIGN KEY (person_id)
+                REFERENCES phonebook(id) ON DELETE CASCADE
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+            """
+            cursor.execute(trigram_table)
+
+            # Tables created before name_key or number_key existed are migrated
+            # in place. The steps are independent, so one that fails (e.g.
+            # duplicate names blocking the unique index) does not hold back
+            # the others
+            run_migrations(cursor, [
+                ('name_key', migrate_name_key),
+                ('number_key', migrate_number_key),
+                ('trigram index', backfill_trigrams),
+            ])
+
+    def search(self, keyword, limit, after=None, min_position=None):
+        query, params = build_search_query(keyword, limit, after, '%s')
+        return self._read(query, params, min_position)
+
+    def search_number(self, number_key, limit, after=None, prefix=False, min_position=None):
+        query, params = build_number_query(number_key, limit, after, prefix, '%s')
+        return self._read(query, params, min_position)
+
+    def fuzzy_candidates(self, grams, min_shared, length, limit, min_position=None):
+        query, params = build_fuzzy_query(grams, min_shared, length, limit, '%s')
+        return self._read(query, params, min_position)
+
+    def _read(self, query, params, min_position=None):
+        """Run a read on a replica when there is one, on the primary otherwise"""
+        if self.replicas is not None:
+            rows = self._query_replica(query, params, min_position)
+            if rows is not None:
+                return rows
+        with self.cursor() as (_, cursor):
+            cursor.execute(query, params)
+            return list(cursor.fetchall())
+
+    def write_position(self):
+        """GTID set executed by the primary, or None without replicas"""
+        if self.replicas is None:
+            return None
+        with self.cursor() as (_, cursor):
+            cursor.execute("SELECT @@GLOBAL.gtid_executed")
+            return cursor.fetchone()[0] or None
+
+    def _query_replica(self, query, params, min_position=None):
+        """Run a read on a healthy replica that has applied min_position, or
+        return None to use the primary"""
+        for _ in range(len(self.replicas.pools)):
+            try:
+                name, connection = self.replicas.acquire()
+            except ReplicasUnavailable:
+                return None
+            try:
+                cursor = connection.cursor()
+                try:
+                    caught_up = True
+                    if min_position:
+                        # Returns 0 once the GTID set is applied, 1 on timeout
+                        cursor.execute("SELECT WAIT_FOR_EXECUTED_GTID_SET(%s, %s)",
+                                       (min_position, self.replica_wait_timeout))
+                        caught_up = cursor.fetchone()[0] == 0
+                    if caught_up:
+                        cursor.execute(query, params)
+                        rows = list(cursor.fetchall())
+                finally:
+                    cursor.close()
+            except Exception as e:
+                # Eject it and retry on the next replica
+                self.replicas.fail(name, connection, e)
+                continue
+            self.replicas.release(name, connection)
+            if caught_up:
+                return rows
+            # Lagging but healthy; try the next replica
+        return None
+
+    def get(self, name_key):
+        with self.cursor() as (_, cursor):
+            cursor.execute("SELECT id, name, number, name_key FROM phonebook WHERE name_key = %s", (name_key,))
+            return cursor.fetchone()
+
+    def save(self, name_key, number, upsert=False):
+        """Insert or upsert a person and index its trigrams in one transaction.
+
+        The unique index replaces a duplicate check, so the insert itself is
+        a single statement. The trigram rows need one more, and BEGIN and
+        COMMIT keep a committed person from ever missing from the index: an
+        add takes four round trips, plus the GTID read for the consistency
+        token when replicas are configured. A trigger could write the
+        trigrams, but MySQL cannot fold diacritics the way search_index does.
+        """
+        with self.cursor() as (connection, cursor):
+            try:
+                with transaction(connection):
+                    if upsert:
+                        upsert_query = """
+                        INSERT INTO phonebook (name, number, number_key) VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE number = VALUES(number), number_key = VALUES(number_key)
+                        """
+                        cursor.execute(upsert_query, (name_key, number, normalize_number(number)))
+                        inserted = cursor.rowcount == 1
+                    else:
+                        # Duplicates are rejected by the unique index
+                        insert_query = "INSERT INTO phonebook (name, number, number_key) VALUES (%s, %s, %s)"
+                        cursor.execute(insert_query, (name_key, number, normalize_number(number)))
+                        inserted = True
+
+                    if inserted:
+                        index_person_trigrams(cursor, cursor.lastrowid, name_key)
+            except IntegrityError as e:
+                if e.args[0] != ER_DUP_ENTRY:
+                    raise
+                raise DuplicateName(name_key) from e
+            return inserted
+
+    def update(self, name_key, number):
+        with self.cursor() as (_, cursor):
+            # Check if person exists
+            cursor.execute("SELECT id, name FROM phonebook WHERE name_key = %s", (name_key,))
+            row = cursor.fetchone()
+            if row is None:
+                return False
+
+            cursor.execute("UPDATE phonebook SET name = %s, number = %s, number_key = %s WHERE id = %s",
+                           (row[1], number, normalize_number(number), row[0]))
+            return True
+
+    def delete(self, name_key):
+        with self.cursor() as (_, cursor):
+            # Check if person exists
+            cursor.execute("SELECT id FROM phonebook WHERE name_key = %s", (name_key,))
+            row = cursor.fetchone()
+            if row is None:
+                return False
+
+            # Trigram rows go with it through ON DELETE CASCADE
+            cursor.execute("DELETE FROM phonebook WHERE id = %s", (row[0],))
+            return True
+
+    def bulk_save(self, rows, upsert=False):
+        try:
+            return self._bulk_save(rows, upsert)
+        except IntegrityError as e:
+            if e.args[0] != ER_DUP_ENTRY:
+                raise
+        # The unique index compares names under the column's collation, which
+        # ignores accents the duplicate check below tells apart. The batch was
+        # rolled back, so retry it row by row to reject only the colliding rows
+        inserted, updated, duplicates = 0, 0, set()
+        for name_key, number in rows:
+            try:
+                if self.save(name_key, number, upsert):
+                    inserted += 1
+                else:
+                    updated += 1
+            except DuplicateName:
+                duplicates.add(name_key)
+        return inserted, updated, duplicates
+
+    def _bulk_save(self, rows, upsert):
+        keys = [name_key for name_key, _ in rows]
+        placeholders = ", ".join(["%s"] * len(keys))
+        with self.cursor() as (connection, cursor):
+            with transaction(connection):
+                # Lock the batch's keys so concurrent adds cannot slip in between
+                # the duplicate check and the insert
+                cursor.execute(f"SELECT name_key FROM phonebook WHERE name_key IN ({placeholders}) FOR UPDATE", keys)
+                existing = {row[0] for row in cursor.fetchall()}
+
+                duplicates = set() if upsert else existing
+                to_write = [row for row in rows if row[0] not in duplicates]
+                if to_write:
+                    if upsert:
+                        insert_query = """
+                        INSERT INTO phonebook (name, number, number_key) VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE number = VALUES(number), number_key = VALUES(number_key)
+                        """
+                    else:
+                        insert_query = "INSERT INTO phonebook (name, number, number_key) VALUES (%s, %s, %s)"
+                    cursor.executemany(insert_query, [(name_key, number, normalize_number(number))
+                                                      for name_key, number in to_write])
+
+                new_keys = [name_key for name_key, _ in to_write if name_key not in existing]
+                if new_keys:
+                    placeholders = ", ".join(["%s"] * len(new_keys))
+                    cursor.execute(f"SELECT id, name_key FROM phonebook WHERE name_key IN ({placeholders})", new_keys)
+                    gram_rows = [(gram, person_id) for person_id, name_key in cursor.fetchall() for gram in trigrams(name_key)]
+                    if gram_rows:
+                        cursor.executemany("INSERT IGNORE INTO phonebook_trigram (gram, person_id) VALUES (%s, %s)", gram_rows)
+        return len(new_keys), len(to_write) - len(new_keys), duplicates
+
+    def iter_rows(self, after_id=0):
+        # Borrowed up front so callers can report an outage before streaming
+        return RowStream(self.pool, self.acquire(),
+                         "SELECT id, name, number, name_key FROM phonebook WHERE id > %s ORDER BY id", (after_id,))
+
+    def stats(self):
+        stats = self.pool.stats()
+        if self.replicas is not None:
+            stats['replicas'] = self.replicas.stats()
+        return stats
+
+
+class RowStream:
+    """Iterator over the rows of a query on an unbuffered server-side cursor.
+
+    Memory use stays constant regardless of table size. The connection goes
+    back to the pool once every row has been read. close() gives it back
+    if iteration never started and discards it if the stream is abandoned
+    midway, since an unread result cannot be drained cheaply. Closing is
+    idempotent, so a response that is never read (HEAD, early disconnect)
+    does not leak its connection.
+    """
+
+    def __init__(self, pool, connection, query, params=()):
+        self._pool = pool
+        self._connection = connection
+        self._started = False
+        self._rows = self._stream(query, params)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._started = True
+        return next(self._rows)
+
+    def close(self):
+        self._rows.close()
+        self._finish(discard=self._started)
+
+    def _stream(self, query, params):
+        cursor = self._connection.cursor(InstrumentedSSCursor)
+        try:
+            cursor.execute(query, params)
+            yield from cursor
+            cursor.close()
+        except BaseException:
+            self._finish(discard=True)
+            raise
+        self._finish(discard=False)
+
+    def _finish(self, discard):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if discard:
+            self._pool.discard(connection)
+        else:
+            self._pool.release(connection)
+
+
+class SQLiteStorage(Storage):
+    """SQLite backend for local development, CI and benchmarks.
+
+    One connection is shared by all threads and serialized with a lock;
+    SQLite only allows a single writer at a time anyway. ``path`` may be
+    ':memory:' for a throwaway database. name_key is computed in Python
+    because generated columns need a recent SQLite.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._connection = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def connection(self):
+        """Yield the shared connection while holding the lock"""
+        with self._lock:
+            if self._connection is None:
+                try:
+                    connection = sqlite3.connect(
+                        self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Database connection failed: {e}")
+                    raise StorageUnavailable(str(e)) from e
+                connection.execute("PRAGMA foreign_keys = ON")
+                if self.path != ':memory:':
+                    connection.execute("PRAGMA journal_mode = WAL")
+                self._connection = connection
+            yield self._connection
+
+    def _execute(self, connection, statement, params=()):
+        start = time.perf_counter()
+        try:
+            return connection.execute(statement, params)
+        finally:
+            record_round_trip(statement, len(params), time.perf_counter() - start)
+
+    def _executemany(self, connection, statement, rows):
+        start = time.perf_counter()
+        try:
+            return connection.executemany(statement, rows)
+        finally:
+            record_round_trip(statement, sum(len(row) for row in rows), time.perf_counter() - start)
+
+    @contextmanager
+    def _transaction(self, connection):
+        # IMMEDIATE takes the write lock up front, so check-then-write
+        # sequences stay atomic across processes sharing the file
+        self._execute(connection, "BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._execute(connection, "ROLLBACK")
+            raise
+        self._execute(connection, "COMMIT")
+
+    def _index_trigrams(self, connection, person_id, name_key):
+        rows = [(gram, person_id) for gram in trigrams(name_key)]
+        if rows:
+            self._executemany(connection, "INSERT OR IGNORE INTO phonebook_trigram (gram, person_id) VALUES (?, ?)", rows)
+
+    def init_schema(self):
+        with self.connection() as connection:
+            self._execute(connection, """
+            CREATE TABLE IF NOT EXISTS phonebook(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            number TEXT NOT NULL,
+            name_key TEXT NOT NULL UNIQUE,
+            number_key TEXT NOT NULL DEFAULT ''
+            )
+            """)
+            self._migrate_number_key(connection)
+            self._execute(connection, "CREATE INDEX IF NOT EXISTS idx_phonebook_number_key ON phonebook (number_key)")
+            self._execute(connection, """
+            CREATE TABLE IF NOT EXISTS phonebook_trigram(
+            gram TEXT NOT NULL,
+            person_id INTEGER NOT NULL REFERENCES phonebook(id) ON DELETE CASCADE,
+            PRIMARY KEY (gram, person_id)
+            ) WITHOUT ROWID
+            """)
+            self._execute(connection, "CREATE INDEX IF NOT EXISTS idx_phonebook_trigram_person ON phonebook_trigram (person_id)")
+            self._fold_trigrams(connection)
+            self._backfill_trigrams(connection)
+
+    def _fold_trigrams(self, connection):
+        """Fold the diacritics out of trigrams indexed before they were folded.
+
+        MySQL needs no such step, since its accent-insensitive collation
+        already matches folded grams against the stored ones.
+        """
+        grams = [gram for (gram,) in self._execute(connection, "SELECT DISTINCT gram FROM phonebook_trigram").fetchall()]
+        stale = [(fold_diacritics(gram), gram) for gram in grams if fold_diacritics(gram) != gram]
+        if not stale:
+            return
+        logger.info(f"Folding diacritics out of {len(stale)} indexed trigrams")
+        self._executemany(connection, "INSERT OR IGNORE INTO phonebook_trigram (gram, person_id) "
+                                      "SELECT ?, person_id FROM phonebook_trigram WHERE gram = ?", stale)
+        self._executemany(connection, "DELETE FROM phonebook_trigram WHERE gram = ?", [(gram,) for _, gram in stale])
+
+    def _backfill_trigrams(self, connection):
+        """Index every person that has no trigrams, or no word trigrams, yet"""
+        missing = self._execute(connection, UNINDEXED_PERSONS).fetchall()
+        if not missing:
+            return
+        logger.info(f"Backfilling trigram index for {len(missing)} persons")
+        self._executemany(connection, "INSERT OR IGNORE INTO phonebook_trigram (gram, person_id) VALUES (?, ?)",
+                          [(gram, person_id) for person_id, name_key in missing for gram in trigrams(name_key)])
+
+    def _migrate_number_key(self, connection):
+        """Add and fill in number_key on databases created before it existed"""
+        columns = [row[1] for row in self._execute(connection, "PRAGMA table_info(phonebook)")]
+        if 'number_key' not in columns:
+            logger.info("Adding number_key column to phonebook table")
+            self._execute(connection, "ALTER TABLE phonebook ADD COLUMN number_key TEXT NOT NULL DEFAULT ''")
+        missing = [(normalize_number(number), person_id) for person_id, number in self._execute(
+            connection, "SELECT id, number FROM phonebook WHERE number_key = '' AND number <> ''"
+        ).fetchall()]
+        missing = [row for row in missing if row[0]]
+        if missing:
+            logger.info(f"Backfilling number_key for {len(missing)} persons")
+            self._executemany(connection, "UPDATE phonebook SET number_key = ? WHERE id = ?", missing)
+
+    def search(self, keyword, limit, after=None, min_position=None):
+        query, params = build_search_query(keyword, limit, after, '?')
+        if any(c in keyword for c in LIKE_SPECIAL_CHARS):
+            # Match MySQL, where backslash escapes LIKE wildcards by default
+            query = query.replace("LIKE ?", "LIKE ? ESCAPE '\\'")
+        with self.connection() as connection:
+            return self._execute(connection, query, params).fetchall()
+
+    def search_number(self, number_key, limit, after=None, prefix=False, min_position=None):
+        query, params = build_number_query(number_key, limit, after, prefix, '?')
+        with self.connection() as connection:
+            return self._execute(connection, query, params).fetchall()
+
+    def fuzzy_candidates(self, grams, min_shared, length, limit, min_position=None):
+        query, params = build_fuzzy_query(grams, min_shared, length, limit, '?', char_length='LENGTH')
+        with self.connection() as connection:
+            return self._execute(connection, query, params).fetchall()
+
+    def get(self, name_key):
+        with self.connection() as connection:
+            return self._execute(
+                connection, "SELECT id, name, number, name_key FROM phonebook WHERE name_key = ?", (name_key,)
+            ).fetchone()
+
+    def save(self, name_key, number, upsert=False):
+        with self.connection() as connection, self._transaction(connection):
+            row = self._execute(connection, "SELECT id FROM phonebook WHERE name_key = ?", (name_key,)).fetchone()
+            if row is not None:
+                if not upsert:
+                    raise DuplicateName(name_key)
+                self._execute(connection, "UPDATE phonebook SET number = ?, number_key = ? WHERE id = ?",
+                              (number, normalize_number(number), row[0]))
+                return False
+            cursor = self._execute(
+                connection, "INSERT INTO phonebook (name, number, name_key, number_key) VALUES (?, ?, ?, ?)",
+                (name_key, number, name_key, normalize_number(number))
+            )
+            self._index_trigrams(connection, cursor.lastrowid, name_key)
+            return True
+
+    def update(self, name_key, number):
+        with self.connection() as connection:
+            cursor = self._execute(connection, "UPDATE phonebook SET number = ?, number_key = ? WHERE name_key = ?",
+                                   (number, normalize_number(number), name_key))
+            return cursor.rowcount > 0
+
+    def delete(self, name_key):
+        with self.connection() as connection:
+            cursor = self._execute(connection, "DELETE FROM phonebook WHERE name_key = ?", (name_key,))
+            return cursor.rowcount > 0
+
+    def bulk_save(self, rows, upsert=False):
+        keys = [name_key for name_key, _ in rows]
+        with self.connection() as connection, self._transaction(connection):
+            existing = set()
+            # Stay well below SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join(["?"] * len(chunk))
+                existing.update(row[0] for row in self._execute(
+                    connection, f"SELECT name_key FROM phonebook WHERE name_key IN ({placeholders})", chunk
+                ))
+
+            duplicates = set() if upsert else existing
+            updates = [(number, normalize_number(number), name_key) for name_key, number in rows if name_key in existing and upsert]
+            if updates:
+                self._executemany(connection, "UPDATE phonebook SET number = ?, number_key = ? WHERE name_key = ?", updates)
+
+            inserted = 0
+            for name_key, number in rows:
+                if name_key in existing:
+                    continue
+                cursor = self._execute(
+                    connection, "INSERT INTO phonebook (name, number, name_key, number_key) VALUES (?, ?, ?, ?)",
+                    (name_key, number, name_key, normalize_number(number))
+                )
+                self._index_trigrams(connection, cursor.lastrowid, name_key)
+                inserted += 1
+        return inserted, len(updates), duplicates
+
+    def iter_rows(self, after_id=0):
+        # Connect now so an outage is reported before streaming starts
+        with self.connection():
+            pass
+        return self._page_rows(after_id)
+
+    def _page_rows(self, last_id, page_size=1000):
+        """Yield rows in id order one page at a time, so the lock is not held
+        while the caller consumes them"""
+        while True:
+            with self.connection() as connection:
+                rows = self._execute(
+                    connection,
+                    "SELECT id, name, number, name_key FROM phonebook WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, page_size),
+                ).fetchall()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+
+class MemoryStorage(Storage):
+    """Pure in-memory backend for tests and benchmarks.
+
+    Data lives in the process and is lost on restart; each gunicorn worker
+    has its own copy. Names are kept in (name_key, id) order and indexed by
+    trigram, and numbers in (number_key, id) order, mirroring the SQL
+    backends.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._rows = {}
+        self._keys = {}
+        self._order = []
+        self._grams = {}
+        self._numbers = []
+
+    def init_schema(self):
+        pass
+
+    def _insert(self, name_key, number):
+        person_id = next(self._ids)
+        self._rows[name_key] = (person_id, name_key, number, name_key)
+        self._keys[person_id] = name_key
+        bisect.insort(self._order, (name_key, person_id))
+        bisect.insort(self._numbers, (normalize_number(number), person_id))
+        for gram in trigrams(name_key):
+            self._grams.setdefault(gram, set()).add(person_id)
+
+    def search(self, keyword, limit, after=None, min_position=None):
+        matches = like_matcher(keyword)
+        grams = query_trigrams(keyword)
+        with self._lock:
+            if grams is None:
+                # Walk the ordered keys from the cursor until the page is full
+                start = bisect.bisect_right(self._order, tuple(after)) if after is not None else 0
+                rows = []
+                for name_key, _ in itertools.islice(self._order, start, None):
+                    if matches(name_key):
+                        rows.append(self._rows[name_key])
+                        if len(rows) >= limit:
+                            break
+                return rows
+
+            candidates = set.intersection(*(self._grams.get(gram, set()) for gram in grams))
+            rows = [self._rows[self._keys[person_id]] for person_id in candidates]
+        rows = [row for row in rows if matches(row[3]) and (after is None or (row[3], row[0]) > tuple(after))]
+        rows.sort(key=lambda row: (row[3], row[0]))
+        return rows[:limit]
+
+    def _set_number(self, row, number):
+        """Replace the number of an existing row"""
+        self._numbers.pop(bisect.bisect_left(self._numbers, (normalize_number(row[2]), row[0])))
+        bisect.insort(self._numbers, (normalize_number(number), row[0]))
+        self._rows[row[3]] = row[:2] + (number,) + row[3:]
+
+    def search_number(self, number_key, limit, after=None, prefix=False, min_position=None):
+        end = number_prefix_end(number_key) if prefix else None
+        with self._lock:
+            start = bisect.bisect_left(self._numbers, (number_key,))
+            if after is not None:
+                start = max(start, bisect.bisect_right(self._numbers, tuple(after)))
+            rows = []
+            for key, person_id in itertools.islice(self._numbers, start, None):
+                matches = key < end if prefix else key == number_key
+                if not matches:
+                    break
+                rows.append(self._rows[self._keys[person_id]])
+                if len(rows) >= limit:
+                    break
+            return rows
+
+    def fuzzy_candidates(self, grams, min_shared, length, limit, min_position=None):
+        with self._lock:
+            shared = collections.Counter()
+            for gram in grams:
+                shared.update(self._grams.get(gram, ()))
+            ranked = heapq.nsmallest(limit, (
+                (-count, abs(len(self._keys[person_id]) - length), person_id)
+                for person_id, count in shared.items() if count >= min_shared
+            ))
+            return [self._rows[self._keys[person_id]] for _, _, person_id in ranked]
+
+    def get(self, name_key):
+        with self._lock:
+            return self._rows.get(name_key)
+
+    def save(self, name_key, number, upsert=False):
+        with self._lock:
+            row = self._rows.get(name_key)
+            if row is not None:
+                if not upsert:
+                    raise DuplicateName(name_key)
+                self._set_number(row, number)
+                return False
+            self._insert(name_key, number)
+            return True
+
+    def update(self, name_key, number):
+        with self._lock:
+            row = self._rows.get(name_key)
+            if row is None:
+                return False
+            self._set_number(row, number)
+            return True
+
+    def delete(self, name_key):
+        with self._lock:
+            row = self._rows.pop(name_key, None)
+            if row is None:
+                return False
+            del self._keys[row[0]]
+            self._order.pop(bisect.bisect_left(self._order, (name_key, row[0])))
+            self._numbers.pop(bisect.bisect_left(self._numbers, (normalize_number(row[2]), row[0])))
+            for gram in trigrams(name_key):
+                ids = self._grams.get(gram)
+                if ids is not None:
+                    ids.discard(row[0])
+                    if not ids:
+                        del self._grams[gram]
+            return True
+
+    def bulk_save(self, rows, upsert=False):
+        inserted, updated, duplicates = 0, 0, set()
+        with self._lock:
+            for name_key, number in rows:
+                row = self._rows.get(name_key)
+                if row is None:
+                    self._insert(name_key, number)
+                    inserted += 1
+                elif upsert:
+                    self._set_number(row, number)
+                    updated += 1
+                else:
+                    duplicates.add(name_key)
+        return inserted, updated, duplicates
+
+    def iter_rows(self, after_id=0):
+        with self._lock:
+            rows = sorted(row for row in self._rows.values() if row[0] > after_id)
+        return iter(rows)
+
+    def stats(self):
+        with self._lock:
+            return {'rows': len(self._rows)}
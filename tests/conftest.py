@@ -0,0 +1,70 @@
+"""
+Shared fixtures for the Phonebook App tests
+"""
+
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeCursor:
+    """DB-API cursor over a fixed list of rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.closed = False
+
+    def execute(self, query, args=None):
+        return len(self.rows)
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """Connection handed out by a ConnectionPool in tests; serves fixed rows"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.open = True
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self.rows)
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def fake_connection():
+    """Factory for connections serving fixed rows, to hand to a ConnectionPool"""
+    return FakeConnection
+
+
+@pytest.fixture(scope='session')
+def phonebook_app():
+    return importlib.import_module('phonebook-app-secure')
+
+
+@pytest.fixture
+def app(phonebook_app, tmp_path):
+    # Local stand-in for SSM; the memory backend never uses the credentials
+    parameters = tmp_path / 'parameters.json'
+    parameters.write_text(json.dumps({'/ismail/phonebook/username': 'test', '/ismail/phonebook/password': 'test'}))
+    return phonebook_app.create_app({
+        'TESTING': True,
+        'SSM_LOCAL_PARAMETERS': str(parameters),
+        'STORAGE_BACKEND': 'memory',
+        'SLOW_QUERY_THRESHOLD_MS': None,
+    })
@@ -0,0 +1,83 @@
+def create(client, name, number, **payload):
+    return client.post('/api/v1/persons', json={'name': name, 'number': number, **payload})
+
+
+def names(response):
+    return [person['name'] for person in response.get_json()['persons']]
+
+
+def test_create_get_update_delete(app):
+    client = app.test_client()
+
+    response = create(client, 'ayşe yılmaz', '05321234567')
+    assert response.status_code == 201
+    assert response.get_json() == {'status': 'created', 'message': 'Person Ayşe Yılmaz added to Phonebook successfully'}
+
+    person = client.get('/api/v1/persons/Ayşe Yılmaz').get_json()
+    assert (person['name'], person['number']) == ('Ayşe Yılmaz', '05321234567')
+
+    response = client.put('/api/v1/persons/ayşe yılmaz', json={'number': '05320000000'})
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'updated'
+    assert client.get('/api/v1/persons/ayşe yılmaz').get_json()['number'] == '05320000000'
+
+    response = client.delete('/api/v1/persons/ayşe yılmaz')
+    assert response.status_code == 204
+    assert response.get_data() == b''
+    assert client.get('/api/v1/persons/ayşe yılmaz').status_code == 404
+
+
+def test_duplicate_create_conflicts_unless_upsert(app):
+    client = app.test_client()
+    create(client, 'Mehmet Kaya', '02125551234')
+
+    response = create(client, 'MEHMET KAYA', '02125550000')
+    assert response.status_code == 409
+    assert response.get_json() == {'error': 'Person with name Mehmet Kaya already exists.'}
+
+    response = create(client, 'mehmet kaya', '02125550000', upsert=True)
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'updated'
+    assert client.get('/api/v1/persons/mehmet kaya').get_json()['number'] == '02125550000'
+
+
+def test_search_pages_with_cursor(app):
+    client = app.test_client()
+    for name, number in [('Ali Kaya', '02125550001'), ('Veli Kaya', '02125550002'), ('Can Kaya', '02125550003')]:
+        create(client, name, number)
+
+    first = client.get('/api/v1/persons?q=kaya&limit=2')
+    assert names(first) == ['Ali Kaya', 'Can Kaya']
+    cursor = first.get_json()['next']
+    assert cursor is not None
+
+    second = client.get(f'/api/v1/persons?q=kaya&limit=2&cursor={cursor}')
+    assert names(second) == ['Veli Kaya']
+    assert second.get_json()['next'] is None
+
+
+def test_invalid_requests_are_rejected(app):
+    client = app.test_client()
+
+    assert client.get('/api/v1/persons').status_code == 400
+    assert client.post('/api/v1/persons', json={'name': 'Ali Kaya', 'number': 5321234567}).status_code == 400
+    assert client.post('/api/v1/persons', data='not json').status_code == 400
+    assert create(client, 'Ali Kaya', '123').get_json() == {'error': 'Phone number should be at least 10 digits'}
+    assert client.put('/api/v1/persons/ali kaya', json={}).status_code == 400
+
+
+def test_missing_person(app):
+    client = app.test_client()
+
+    assert client.get('/api/v1/persons/nobody').get_json() == {'error': 'Person with name Nobody does not exist.'}
+    assert client.put('/api/v1/persons/nobody', json={'number': '05321234567'}).status_code == 404
+    assert client.delete('/api/v1/persons/nobody').status_code == 404
+
+
+def test_responses_are_json_not_html(app):
+    client = app.test_client()
+    create(client, 'Ali Kaya', '02125550001')
+
+    response = client.get('/api/v1/persons?q=ali')
+    assert response.mimetype == 'application/json'
+    assert b'<html' not in response.get_data().lower()
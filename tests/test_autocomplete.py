@@ -0,0 +1,105 @@
+import threading
+import time
+
+from autocomplete import PrefixIndex
+
+
+class Rows:
+    """(id, name_key) rows served to a PrefixIndex; records each load"""
+
+    def __init__(self, name_keys=()):
+        self.rows = list(enumerate(name_keys, start=1))
+        self.loads = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def add(self, name_key):
+        self.rows.append((len(self.rows) + 1, name_key))
+
+    def load(self, after_id):
+        self.loads.append(after_id)
+        self.started.set()
+        self.release.wait(5)
+        return [row for row in self.rows if row[0] > after_id]
+
+
+def wait_until_ready(index, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not index.stats()['ready']:
+        assert time.monotonic() < deadline, 'index not built in time'
+        time.sleep(0.01)
+
+
+def test_complete_returns_sorted_prefix_matches():
+    index = PrefixIndex(Rows(['mehmet kaya', 'ali veli', 'mehmet ali', 'memduh can']).load)
+    index.refresh()
+
+    assert index.complete('meh', 10) == ['mehmet ali', 'mehmet kaya']
+    assert index.complete('m', 2) == ['mehmet ali', 'mehmet kaya']
+    assert index.complete('z', 10) == []
+
+
+def test_first_lookup_builds_in_background():
+    rows = Rows(['ali veli'])
+    rows.release.clear()
+    index = PrefixIndex(rows.load)
+
+    assert index.complete('ali', 10) == []
+    assert rows.started.wait(5)
+    rows.release.set()
+    wait_until_ready(index)
+    assert index.complete('ali', 10) == ['ali veli']
+
+
+def test_writes_of_this_worker_apply_immediately():
+    index = PrefixIndex(Rows(['ali veli']).load)
+    index.refresh()
+
+    index.add('ali kaya')
+    index.discard('ali veli')
+
+    assert index.complete('ali', 10) == ['ali kaya']
+
+
+def test_refresh_reads_only_new_rows_until_reload_is_due():
+    rows = Rows(['ali veli'])
+    index = PrefixIndex(rows.load, refresh_seconds=0)
+    index.refresh()
+    rows.add('ali kaya')
+
+    index.refresh()
+
+    assert rows.loads == [0, 1]
+    assert index.complete('ali', 10) == ['ali kaya', 'ali veli']
+
+    index.reload_seconds = 0
+    index.refresh()
+    assert rows.loads[-1] == 0
+    assert index.stats()['reloads'] == 2
+
+
+def test_writes_during_refresh_are_not_lost():
+    rows = Rows(['ali veli'])
+    index = PrefixIndex(rows.load)
+    rows.release.clear()
+    index.refresh_in_background()
+    assert rows.started.wait(5)
+
+    # Missed by the snapshot being loaded
+    index.add('ali kaya')
+    rows.release.set()
+    wait_until_ready(index)
+
+    assert index.complete('ali', 10) == ['ali kaya', 'ali veli']
+
+
+def test_autocomplete_endpoint(app):
+    client = app.test_client()
+    for name, number in [('Mehmet Kaya', '02125551234'), ('Mehmet Ali', '02125550000')]:
+        client.post('/api/v1/persons', json={'name': name, 'number': number})
+    app.extensions['phonebook']['autocomplete'].refresh()
+
+    response = client.get('/api/v1/persons/autocomplete?q=MEH&limit=1')
+    assert response.get_json() == {'names': ['Mehmet Ali']}
+    assert client.get('/api/v1/persons/autocomplete?q=').get_json() == {'names': []}
@@ -0,0 +1,77 @@
+from storage import MemoryStorage
+
+
+class LaggingReplicaStorage(MemoryStorage):
+    """Memory backend whose reads without a position come from a replica
+    stuck before every write"""
+
+    def __init__(self):
+        super().__init__()
+        self.position = 0
+        self.lagging = True
+
+    def write_position(self):
+        return self.position
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        self.position += 1
+        return result
+
+    def search(self, keyword, limit, after=None, min_position=None):
+        if self.lagging and min_position is None:
+            return []
+        return super().search(keyword, limit, after, min_position)
+
+
+def use_lagging_storage(app):
+    storage = LaggingReplicaStorage()
+    app.extensions['phonebook']['storage'] = storage
+    return storage
+
+
+def create_person(client):
+    response = client.post('/api/v1/persons', json={'name': 'Ayşe Yılmaz', 'number': '05321234567'})
+    assert response.status_code == 201
+    return response.headers['X-Consistency-Token']
+
+
+def search(client, token=None):
+    headers = {'X-Consistency-Token': token} if token else {}
+    response = client.get('/api/v1/persons?q=ayşe', headers=headers)
+    assert response.status_code == 200
+    return [person['name'] for person in response.get_json()['persons']]
+
+
+def test_token_reads_own_write_past_stale_cached_page(app):
+    use_lagging_storage(app)
+    token = create_person(app.test_client())
+
+    # Another client caches the lagging replica's page after the write
+    assert search(app.test_client()) == []
+
+    assert search(app.test_client(), token) == ['Ayşe Yılmaz']
+
+
+def test_requests_without_token_use_cache(app):
+    storage = use_lagging_storage(app)
+    create_person(app.test_client())
+    assert search(app.test_client()) == []
+
+    storage.lagging = False
+    assert search(app.test_client()) == []
+
+
+def test_forged_token_is_ignored(app):
+    use_lagging_storage(app)
+    token = create_person(app.test_client())
+
+    assert search(app.test_client(), token[:-2] + 'xx') == []
+
+
+def test_token_is_sent_as_cookie(app):
+    use_lagging_storage(app)
+    client = app.test_client()
+    create_person(client)
+
+    assert search(client) == ['Ayşe Yılmaz']
@@ -0,0 +1,46 @@
+import json
+
+
+class RecordingConnection:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.autocommit_mode = None
+
+    def autocommit(self, value):
+        self.autocommit_mode = value
+
+
+def make_app(phonebook_app, tmp_path, name, host):
+    parameters = tmp_path / f'{name}.json'
+    parameters.write_text(json.dumps({'/ismail/phonebook/username': f'{name}-user',
+                                      '/ismail/phonebook/password': f'{name}-password'}))
+    return phonebook_app.create_app({
+        'TESTING': True,
+        'SSM_LOCAL_PARAMETERS': str(parameters),
+        'MYSQL_DATABASE_HOST': host,
+    })
+
+
+def test_each_app_connects_with_its_own_settings(phonebook_app, tmp_path, monkeypatch):
+    monkeypatch.setattr(phonebook_app.pymysql, 'connect', RecordingConnection)
+    first = make_app(phonebook_app, tmp_path, 'first', 'db-one')
+    second = make_app(phonebook_app, tmp_path, 'second', 'db-two')
+
+    first_connection = phonebook_app.open_db_connection(first)
+    second_connection = phonebook_app.open_db_connection(second)
+
+    assert first_connection.kwargs['host'] == 'db-one'
+    assert first_connection.kwargs['user'] == 'first-user'
+    assert second_connection.kwargs['host'] == 'db-two'
+    assert second_connection.kwargs['password'] == 'second-password'
+    assert first_connection.autocommit_mode is True
+
+
+def test_credentials_stay_out_of_config(phonebook_app, tmp_path, monkeypatch):
+    monkeypatch.setattr(phonebook_app.pymysql, 'connect', RecordingConnection)
+    app = make_app(phonebook_app, tmp_path, 'app', 'db')
+
+    connection = phonebook_app.open_db_connection(app, 'replica:3307')
+
+    assert (connection.kwargs['host'], connection.kwargs['port']) == ('replica', 3307)
+    assert 'app-password' not in app.config.values()
@@ -0,0 +1,74 @@
+import logging
+import re
+
+import pytest
+
+from db_instrumentation import InstrumentedCursorMixin, request_db_stats, server_timing_header, transaction
+
+
+class BaseCursor:
+    """Cursor whose executemany sends one statement per row, like pymysql
+    for anything but a multi-row INSERT"""
+
+    def execute(self, query, args=None):
+        return 1
+
+    def executemany(self, query, args):
+        for row in args:
+            self.execute(query, row)
+
+
+class Cursor(InstrumentedCursorMixin, BaseCursor):
+    pass
+
+
+class Connection:
+    def __init__(self):
+        self.calls = []
+
+    def begin(self):
+        self.calls.append('begin')
+
+    def commit(self):
+        self.calls.append('commit')
+
+    def rollback(self):
+        self.calls.append('rollback')
+
+
+def test_responses_carry_server_timing(app):
+    response = app.test_client().get('/api/v1/persons?q=kaya')
+
+    assert re.fullmatch(r'db;dur=\d+\.\d{2};desc="0 round trips", total;dur=\d+\.\d{2}',
+                        response.headers['Server-Timing'])
+
+
+def test_statements_and_transactions_are_round_trips(app):
+    with app.test_request_context():
+        connection = Connection()
+        cursor = Cursor()
+        with transaction(connection):
+            cursor.execute("SELECT 1")
+            cursor.executemany("INSERT INTO t VALUES (%s)", [(1,), (2,)])
+        with pytest.raises(ValueError):
+            with transaction(connection):
+                raise ValueError
+
+        assert connection.calls == ['begin', 'commit', 'begin', 'rollback']
+        assert request_db_stats().round_trips == 7
+
+
+def test_slow_queries_are_logged_without_values(app, caplog):
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    with app.test_request_context(), caplog.at_level(logging.WARNING, logger='phonebook.slow_query'):
+        Cursor().executemany("INSERT INTO phonebook (name, number)\n    VALUES (%s, %s)",
+                             [('ayşe yılmaz', '05321234567')])
+
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert message.endswith('2 params redacted): INSERT INTO phonebook (name, number) VALUES (%s, %s)')
+    assert 'ayşe' not in message and '0532' not in message
+
+
+def test_server_timing_without_request_stats():
+    assert server_timing_header(None, 0.0031) == 'total;dur=3.10'
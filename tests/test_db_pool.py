@@ -0,0 +1,120 @@
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def make_pool(fake_connection):
+    """Return a factory for (pool, connections opened by the pool)"""
+    def make(**kwargs):
+        opened = []
+
+        def connect():
+            connection = fake_connection()
+            opened.append(connection)
+            return connection
+
+        kwargs.setdefault('min_size', 0)
+        kwargs.setdefault('timeout', 0.05)
+        return ConnectionPool(connect, **kwargs), opened
+    return make
+
+
+def test_release_reuses_connection(make_pool):
+    pool, opened = make_pool(max_size=2)
+
+    connection = pool.acquire()
+    pool.release(connection)
+
+    assert pool.acquire() is connection
+    assert len(opened) == 1
+
+
+def test_acquire_times_out_when_exhausted(make_pool):
+    pool, _ = make_pool(max_size=2)
+    held = [pool.acquire(), pool.acquire()]
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    pool.release(held.pop())
+    assert pool.acquire() is not None
+
+
+def test_warm_opens_min_size_connections(make_pool):
+    pool, opened = make_pool(min_size=2, max_size=4)
+
+    pool.release(pool.acquire())
+
+    assert len(opened) == 2
+    assert pool.stats() == {'size': 2, 'idle': 2, 'in_use': 0, 'max_size': 4}
+
+
+def test_discard_frees_a_slot(make_pool):
+    pool, opened = make_pool(max_size=1)
+
+    connection = pool.acquire()
+    pool.discard(connection)
+
+    assert not connection.open
+    assert pool.stats()['size'] == 0
+    assert pool.acquire() is opened[1]
+
+
+def test_broken_connection_is_not_returned_to_idle(make_pool):
+    pool, _ = make_pool(max_size=1)
+
+    connection = pool.acquire()
+    connection.open = False
+    pool.release(connection)
+
+    assert pool.stats() == {'size': 0, 'idle': 0, 'in_use': 0, 'max_size': 1}
+
+
+def test_unknown_connections_are_ignored(make_pool, fake_connection):
+    pool, _ = make_pool(max_size=1)
+    pool.release(pool.acquire())
+
+    pool.release(fake_connection())
+    pool.discard(fake_connection())
+    pool.release(None)
+
+    assert pool.stats() == {'size': 1, 'idle': 1, 'in_use': 0, 'max_size': 1}
+
+
+def test_stale_connection_is_replaced_on_checkout(make_pool):
+    pool, opened = make_pool(max_size=1, max_idle=0.0)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is not first
+    assert not first.open
+    assert len(opened) == 2
+
+
+def test_leaked_connections_exhaust_the_pool(make_pool):
+    pool, _ = make_pool(max_size=3)
+
+    for _ in range(10):
+        connection = pool.acquire()
+        pool.release(connection)
+    assert pool.stats()['in_use'] == 0
+
+    for _ in range(3):
+        pool.acquire()
+    assert pool.stats()['in_use'] == 3
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+
+def test_close_refuses_checkouts(make_pool):
+    pool, opened = make_pool(max_size=2)
+    pool.release(pool.acquire())
+
+    pool.close()
+
+    assert not opened[0].open
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
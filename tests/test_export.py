@@ -0,0 +1,64 @@
+from db_pool import ConnectionPool
+from storage import MySQLStorage
+
+ROWS = [(1, 'ayşe yılmaz', '05321234567', 'ayşe yılmaz'), (2, 'mehmet kaya', '02125551234', 'mehmet kaya')]
+
+
+def use_mysql_storage(app, fake_connection, max_size=3):
+    pool = ConnectionPool(lambda: fake_connection(ROWS), min_size=1, max_size=max_size, timeout=0.1)
+    app.extensions['phonebook']['storage'] = MySQLStorage(pool)
+    return pool
+
+
+def export_lines(client):
+    response = client.get('/api/v1/persons/export?format=jsonl')
+    assert response.status_code == 200
+    return response.get_data(as_text=True).splitlines()
+
+
+def test_head_requests_return_export_connection(app, fake_connection):
+    pool = use_mysql_storage(app, fake_connection)
+    client = app.test_client()
+    assert len(export_lines(client)) == len(ROWS)
+    before = pool.stats()
+
+    for _ in range(pool.max_size * 2):
+        response = client.head('/api/v1/persons/export')
+        assert response.status_code == 200
+        response.close()
+
+    assert pool.stats() == before
+    assert before['in_use'] == 0
+
+
+def test_abandoned_exports_return_connection(app, fake_connection):
+    pool = use_mysql_storage(app, fake_connection)
+    client = app.test_client()
+    assert len(export_lines(client)) == len(ROWS)
+    before = pool.stats()
+
+    for _ in range(pool.max_size * 2):
+        # Closed before the first chunk is pulled
+        client.get('/api/v1/persons/export', buffered=False).close()
+    assert pool.stats() == before
+
+    # Abandoned midway: the connection is discarded, not leaked
+    response = client.get('/api/v1/persons/export', buffered=False)
+    next(iter(response.response))
+    response.close()
+    assert pool.stats()['in_use'] == 0
+
+    assert len(export_lines(client)) == len(ROWS)
+    assert pool.stats()['in_use'] == 0
+
+
+def test_vcard_export_has_required_properties(app):
+    client = app.test_client()
+    client.post('/api/v1/persons', json={'name': 'Kaya, Mehmet', 'number': '02125551234'})
+
+    response = client.get('/api/v1/persons/export?format=vcard')
+
+    assert response.get_data(as_text=True) == (
+        'BEGIN:VCARD\r\nVERSION:3.0\r\nN:;Kaya\\, Mehmet;;;\r\nFN:Kaya\\, Mehmet\r\n'
+        'TEL;TYPE=CELL:02125551234\r\nEND:VCARD\r\n'
+    )
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from search_index import fuzzy_distance, fuzzy_trigrams, trigrams
+from storage import MemoryStorage, SQLiteStorage
+
+PEOPLE = [
+    ('ali kaya', '05321234567'),
+    ('ali kayaoğlu', '05321234568'),
+    ('hakan şimşek', '05391234567'),
+    ('mehmet yılmaz', '05321234569'),
+]
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend_app(request, app, tmp_path):
+    if request.param == 'sqlite':
+        app.extensions['phonebook']['storage'] = SQLiteStorage(str(tmp_path / 'phonebook.db'))
+    storage = app.extensions['phonebook']['storage']
+    storage.init_schema()
+    storage.bulk_save(PEOPLE)
+    return app
+
+
+def fuzzy_search(app, keyword):
+    response = app.test_client().get('/api/v1/persons', query_string={'q': keyword, 'fuzzy': 'true'})
+    assert response.status_code == 200
+    return [(person['name'], person['distance']) for person in response.json['persons']]
+
+
+@pytest.mark.parametrize('keyword,target', [('kaxa', 'kaya'), ('aly', 'ali'), ('kya', 'kaya')])
+def test_short_typo_shares_trigrams(keyword, target):
+    assert set(fuzzy_trigrams(keyword)) & trigrams(target)
+
+
+@pytest.mark.parametrize('keyword,expected', [
+    ('aly', ('Ali Kaya', 1)),
+    ('kaxa', ('Ali Kaya', 1)),
+    ('ali kaya', ('Ali Kaya', 0)),
+    ('hakan simsek', ('Hakan Şimşek', 0)),
+    ('mehmet ylmaz', ('Mehmet Yılmaz', 1)),
+])
+def test_fuzzy_search_finds_typos(backend_app, keyword, expected):
+    assert fuzzy_search(backend_app, keyword)[0] == expected
+
+
+def test_short_keyword_falls_back_without_distance(backend_app):
+    assert fuzzy_search(backend_app, 'al') == [('Ali Kaya', None), ('Ali Kayaoğlu', None)]
+
+
+def test_fuzzy_candidates_prefer_closest_length(tmp_path):
+    stores = [MemoryStorage(), SQLiteStorage(str(tmp_path / 'phonebook.db'))]
+    for store in stores:
+        store.init_schema()
+        store.bulk_save(PEOPLE)
+    grams = fuzzy_trigrams('ali kaya')
+    results = [[row[3] for row in store.fuzzy_candidates(grams, 1, len('ali kaya'), 1)] for store in stores]
+    assert results == [['ali kaya'], ['ali kaya']]
+
+
+def test_fuzzy_distance_folds_diacritics():
+    assert fuzzy_distance('simsek', 'hakan şimşek', 2) == 0
+    assert fuzzy_distance('ylmaz', 'mehmet yılmaz', 2) == 1
+
+
+def test_sqlite_reindexes_names_indexed_without_word_trigrams(tmp_path):
+    path = str(tmp_path / 'phonebook.db')
+    store = SQLiteStorage(path)
+    store.init_schema()
+    store.bulk_save(PEOPLE)
+    connection = sqlite3.connect(path)
+    # As indexed before word trigrams and diacritic folding
+    connection.execute("DELETE FROM phonebook_trigram WHERE gram LIKE '  %' OR gram LIKE ' %' OR gram LIKE '% '")
+    connection.execute("UPDATE phonebook_trigram SET gram = 'şim' WHERE gram = 'sim'")
+    connection.commit()
+    assert not store.fuzzy_candidates(fuzzy_trigrams('aly'), 1, 3, 10)
+
+    store.init_schema()
+
+    assert [row[3] for row in store.fuzzy_candidates(fuzzy_trigrams('aly'), 1, 3, 10)][:1] == ['ali kaya']
+    assert store.search('şimşek', 10)
@@ -0,0 +1,92 @@
+from pymysql.constants.ER import DUP_ENTRY as ER_DUP_ENTRY
+from pymysql.err import IntegrityError
+
+from search_index import fold_diacritics
+from storage import DuplicateName, MySQLStorage
+
+
+def import_csv(client, body, query=''):
+    response = client.post(f'/api/v1/persons/import{query}', data=body.encode('utf-8'))
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def error_lines(report):
+    return [(error['line'], error['error']) for error in report['errors']]
+
+
+def test_import_skips_header_and_reports_invalid_rows(app):
+    report = import_csv(app.test_client(), 'name,number\nAyşe Yılmaz,05321234567\nMehmet,12\n\nAli Veli\n')
+
+    assert report['inserted'] == 1
+    assert report['failed'] == 2
+    assert error_lines(report) == [(3, 'Phone number should be at least 10 digits'),
+                                   (5, 'Phone number cannot be empty')]
+    assert report['errors_truncated'] is False
+
+
+def test_import_reports_existing_and_repeated_names(app):
+    client = app.test_client()
+    import_csv(client, 'Ayşe Yılmaz,05321234567\n')
+
+    report = import_csv(client, 'ayşe yılmaz,05320000000\nMehmet Kaya,02125551234\nMEHMET KAYA,02125550000\n',
+                        '?batch_size=10')
+
+    assert report['inserted'] == 1
+    assert error_lines(report) == [(1, 'Person with name Ayşe Yılmaz already exists.'),
+                                   (3, 'Person with name Mehmet Kaya already exists.')]
+    assert client.get('/api/v1/persons/mehmet kaya').get_json()['number'] == '02125551234'
+
+
+def test_import_upsert_updates_numbers(app):
+    client = app.test_client()
+    import_csv(client, 'Ayşe Yılmaz,05321234567\n')
+
+    report = import_csv(client, 'Ayşe Yılmaz,05320000000\nMehmet Kaya,02125551234\n', '?upsert=true')
+
+    assert (report['inserted'], report['updated'], report['failed']) == (1, 1, 0)
+    assert client.get('/api/v1/persons/ayşe yılmaz').get_json()['number'] == '05320000000'
+
+
+def test_import_is_searchable_after_cached_search(app):
+    client = app.test_client()
+    assert client.get('/api/v1/persons?q=kaya').get_json()['persons'] == []
+
+    import_csv(client, 'Mehmet Kaya,02125551234\n')
+
+    assert [person['name'] for person in client.get('/api/v1/persons?q=kaya').get_json()['persons']] == ['Mehmet Kaya']
+
+
+class CollatingStorage(MySQLStorage):
+    """MySQL backend whose unique index ignores accents, like utf8mb4_unicode_ci"""
+
+    def __init__(self, names):
+        self.names = {fold_diacritics(name_key): name_key for name_key in names}
+        self.batches = 0
+
+    def _bulk_save(self, rows, upsert):
+        self.batches += 1
+        if any(fold_diacritics(name_key) in self.names for name_key, _ in rows):
+            raise IntegrityError(ER_DUP_ENTRY, "Duplicate entry for key 'uq_phonebook_name_key'")
+        for name_key, _ in rows:
+            self.names[fold_diacritics(name_key)] = name_key
+        return len(rows), 0, set()
+
+    def save(self, name_key, number, upsert=False):
+        if fold_diacritics(name_key) in self.names:
+            raise DuplicateName(name_key)
+        self.names[fold_diacritics(name_key)] = name_key
+        return True
+
+
+def test_collation_duplicates_fail_only_their_row(app):
+    storage = CollatingStorage(['josé garcia'])
+    app.extensions['phonebook']['storage'] = storage
+
+    report = import_csv(app.test_client(), 'Mehmet Kaya,02125551234\nJose Garcia,05321234567\nAli Veli,02165550000\n',
+                        '?batch_size=10')
+
+    assert storage.batches == 1
+    assert report['inserted'] == 2
+    assert error_lines(report) == [(2, 'Person with name Jose Garcia already exists.')]
+    assert set(storage.names.values()) == {'josé garcia', 'mehmet kaya', 'ali veli'}
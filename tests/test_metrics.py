@@ -0,0 +1,66 @@
+import threading
+
+from metrics import MetricsRegistry
+
+
+def samples(text):
+    """Map each sample line of a text exposition to its value"""
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if line and not line.startswith('#'))
+
+
+def test_counter_sums_updates_from_every_thread():
+    registry = MetricsRegistry()
+    counter = registry.counter('jobs_total', 'Jobs run', ('kind',))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(('import',))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert samples(registry.render()) == {'jobs_total{kind="import"}': '8000'}
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('duration_seconds', 'Duration', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe((), value)
+
+    assert samples(registry.render()) == {
+        'duration_seconds_bucket{le="0.1"}': '1',
+        'duration_seconds_bucket{le="1.0"}': '3',
+        'duration_seconds_bucket{le="+Inf"}': '4',
+        'duration_seconds_sum': '4.05',
+        'duration_seconds_count': '4',
+    }
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.gauge('names', 'Names', ('name',)).inc(('say "hi"\\\n',))
+
+    assert 'names{name="say \\"hi\\"\\\\\\n"} 1' in registry.render().splitlines()
+
+
+def test_metrics_page_reports_requests_and_data_functions(app):
+    client = app.test_client()
+    client.get('/api/v1/persons/nobody')
+    client.get('/api/v1/persons?q=kaya')
+    client.get('/api/v1/persons?q=kaya')
+
+    response = client.get('/metrics')
+    assert response.mimetype == 'text/plain'
+    values = samples(response.get_data(as_text=True))
+
+    assert values['phonebook_http_requests_total{endpoint="api_get_person",method="GET",status="404"}'] == '1'
+    assert values['phonebook_http_requests_total{endpoint="api_search_persons",method="GET",status="200"}'] == '2'
+    assert values['phonebook_http_requests_in_flight{endpoint="api_search_persons"}'] == '0'
+    assert values['phonebook_http_requests_in_flight{endpoint="metrics_page"}'] == '1'
+    assert values['phonebook_db_operation_duration_seconds_count{operation="get"}'] == '1'
+    assert values['phonebook_db_operation_duration_seconds_count{operation="search"}'] == '1'
+    assert values['phonebook_search_cache_lookups_total{result="hit"}'] == '1'
@@ -0,0 +1,72 @@
+from search_cache import SearchCache
+
+
+def test_invalidate_drops_matching_keywords_only():
+    cache = SearchCache()
+    cache.put(('ali', 10, None), 'ali page')
+    cache.put(('ali', 10, 'cursor'), 'ali next page')
+    cache.put(('veli', 10, None), 'veli page')
+
+    cache.invalidate('ali kaya')
+
+    assert cache.get(('ali', 10, None)) is None
+    assert cache.get(('ali', 10, 'cursor')) is None
+    assert cache.get(('veli', 10, None)) == 'veli page'
+
+
+def test_invalidate_matches_like_wildcards():
+    cache = SearchCache()
+    cache.put(('a_b', 10, None), 'underscore')
+    cache.put(('a%z', 10, None), 'percent')
+    cache.put(('a\\_b', 10, None), 'escaped')
+    cache.put(('zz', 10, None), 'unrelated')
+
+    cache.invalidate('axb yz')
+
+    assert cache.get(('a_b', 10, None)) is None
+    assert cache.get(('a%z', 10, None)) is None
+    assert cache.get(('a\\_b', 10, None)) == 'escaped'
+    assert cache.get(('zz', 10, None)) == 'unrelated'
+
+
+def test_invalidate_ignores_accents():
+    cache = SearchCache()
+    cache.put(('simsek', 10, None), 'ascii keyword')
+    cache.put(('şimşek', 10, None), 'accented keyword')
+    cache.put(('hakan s_msek', 10, None), 'wildcard keyword')
+    cache.put(('kaya', 10, None), 'unrelated')
+
+    cache.invalidate('hakan şimşek')
+
+    assert cache.get(('simsek', 10, None)) is None
+    assert cache.get(('şimşek', 10, None)) is None
+    assert cache.get(('hakan s_msek', 10, None)) is None
+    assert cache.get(('kaya', 10, None)) == 'unrelated'
+
+
+def test_lru_eviction_and_ttl():
+    cache = SearchCache(max_entries=2)
+    cache.put(('a', 10, None), 1)
+    cache.put(('b', 10, None), 2)
+    cache.get(('a', 10, None))
+    cache.put(('c', 10, None), 3)
+
+    assert cache.get(('b', 10, None)) is None
+    assert cache.get(('a', 10, None)) == 1
+    assert cache.stats()['evictions'] == 1
+
+    expired = SearchCache(ttl=-1)
+    expired.put(('a', 10, None), 1)
+    assert expired.get(('a', 10, None)) is None
+
+
+def test_api_write_invalidates_cached_search(app):
+    client = app.test_client()
+    client.post('/api/v1/persons', json={'name': 'Ali Kaya', 'number': '05321234567'})
+    assert [person['name'] for person in client.get('/api/v1/persons?q=al_').json['persons']] == ['Ali Kaya']
+
+    client.post('/api/v1/persons', json={'name': 'Alp Er', 'number': '05321234568'})
+
+    assert app.extensions['phonebook']['search_cache'].stats()['invalidations'] == 1
+    names = [person['name'] for person in client.get('/api/v1/persons?q=al_').json['persons']]
+    assert names == ['Ali Kaya', 'Alp Er']
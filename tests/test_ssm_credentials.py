@@ -0,0 +1,122 @@
+import json
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from ssm_credentials import CredentialError, CredentialProvider, LocalParameterSource
+
+NAMES = ['/phonebook/username', '/phonebook/password']
+
+
+class CountingSource(LocalParameterSource):
+    """Local source that counts fetches and can block them"""
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.fetches = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def fetch(self, names):
+        self.release.wait(5)
+        self.fetches += 1
+        return super().fetch(names)
+
+
+@pytest.fixture
+def source():
+    return CountingSource({'/phonebook/username': 'admin', '/phonebook/password': 'secret'})
+
+
+@pytest.fixture
+def make_provider():
+    providers = []
+
+    def make(source, **kwargs):
+        provider = CredentialProvider(source, NAMES, **kwargs)
+        providers.append(provider)
+        return provider
+
+    yield make
+    for provider in providers:
+        provider.stop()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not met in time'
+        time.sleep(0.01)
+
+
+def test_values_are_fetched_once(source, make_provider):
+    provider = make_provider(source)
+
+    for _ in range(10):
+        assert provider.get() == {'/phonebook/username': 'admin', '/phonebook/password': 'secret'}
+
+    assert source.fetches == 1
+
+
+def test_stale_values_are_served_while_refreshing(source, make_provider):
+    provider = make_provider(source)
+    provider.get()
+    provider.ttl = 0
+    source.values['/phonebook/password'] = 'rotated'
+    source.release.clear()
+
+    # The refresh is blocked on the source, so the old value is returned
+    assert provider.get()['/phonebook/password'] == 'secret'
+
+    source.release.set()
+    wait_for(lambda: provider.get()['/phonebook/password'] == 'rotated')
+    assert source.fetches >= 2
+
+
+def test_on_refresh_runs_only_when_values_change(source, make_provider):
+    provider = make_provider(source)
+    seen = []
+    provider.on_refresh.append(seen.append)
+
+    provider.refresh()
+    provider.refresh()
+    source.values['/phonebook/password'] = 'rotated'
+    provider.refresh()
+
+    assert [values['/phonebook/password'] for values in seen] == ['secret', 'rotated']
+
+
+def test_cache_file_is_private_and_reused(source, make_provider, tmp_path):
+    cache_path = str(tmp_path / 'credentials.json')
+    make_provider(source, cache_path=cache_path).get()
+
+    assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
+    restarted = CountingSource({})
+    assert make_provider(restarted, cache_path=cache_path).get()['/phonebook/username'] == 'admin'
+    assert restarted.fetches == 0
+
+
+def test_recent_cache_file_is_adopted_instead_of_fetching(source, make_provider, tmp_path):
+    cache_path = tmp_path / 'credentials.json'
+    provider = make_provider(source, cache_path=str(cache_path))
+    provider.get()
+    cache_path.write_text(json.dumps({
+        'fetched_at': time.time(),
+        'values': {'/phonebook/username': 'admin', '/phonebook/password': 'from-another-worker'},
+    }))
+
+    provider._refresh_shared(max_age=60)
+
+    assert provider.get()['/phonebook/password'] == 'from-another-worker'
+    assert source.fetches == 1
+
+
+def test_missing_parameters_raise(make_provider):
+    provider = make_provider(CountingSource({'/phonebook/username': 'admin'}))
+
+    with pytest.raises(CredentialError):
+        provider.get()
@@ -0,0 +1,98 @@
+import pytest
+
+from storage import DuplicateName, MemoryStorage, SQLiteStorage, normalize_name, number_prefix_end
+
+PEOPLE = [
+    ('Mehmet Yılmaz', '0532 123 45 67'),
+    ('Ayşe Yılmaz', '0532 123 45 68'),
+    ('Hakan Şimşek', '0539 999 00 01'),
+    ('Ali Kaya', '0212 555 12 34'),
+    ('Ali Kayaoğlu', '0540 000 00 00'),
+    ('a_b test', '0216 555 00 00'),
+    ('axb test', '0312 555 00 00'),
+]
+
+
+@pytest.fixture
+def backends(tmp_path):
+    stores = [MemoryStorage(), SQLiteStorage(str(tmp_path / 'phonebook.db'))]
+    for store in stores:
+        store.init_schema()
+        store.bulk_save([(normalize_name(name), number) for name, number in PEOPLE])
+    return stores
+
+
+def same(backends, call):
+    results = [call(store) for store in backends]
+    assert results[0] == results[1]
+    return results[0]
+
+
+def names(rows):
+    return [row[3] for row in rows]
+
+
+def test_number_prefix_end():
+    assert number_prefix_end('0532') == '0533'
+    assert number_prefix_end('0539') == '053:'
+    assert '0539' < '05399' < number_prefix_end('0539') < '0540'
+
+
+@pytest.mark.parametrize('keyword', ['yılmaz', 'ali', 'a', 'kaya', 'a_b', 'a\\_b', 'a%b', 'şimşek', 'missing'])
+def test_search_parity(backends, keyword):
+    same(backends, lambda store: store.search(keyword, 10))
+
+
+def test_search_pagination_parity(backends):
+    first = same(backends, lambda store: store.search('a', 2))
+    after = (first[-1][3], first[-1][0])
+    second = same(backends, lambda store: store.search('a', 2, after))
+    assert not set(names(first)) & set(names(second))
+
+
+@pytest.mark.parametrize('number_key,prefix', [
+    ('05321234567', False),
+    ('0532', True),
+    ('0539', True),
+    ('05', True),
+    ('0', True),
+])
+def test_search_number_parity(backends, number_key, prefix):
+    assert same(backends, lambda store: store.search_number(number_key, 10, prefix=prefix))
+
+
+def test_search_number_prefix_ending_in_nine(backends):
+    rows = same(backends, lambda store: store.search_number('0539', 10, prefix=True))
+    assert names(rows) == ['hakan şimşek']
+
+
+def test_search_number_pagination(backends):
+    first = same(backends, lambda store: store.search_number('05', 2, prefix=True))
+    after = (first[-1][2].replace(' ', ''), first[-1][0])
+    second = same(backends, lambda store: store.search_number('05', 10, after=after, prefix=True))
+    assert names(first + second) == ['mehmet yılmaz', 'ayşe yılmaz', 'hakan şimşek', 'ali kayaoğlu']
+
+
+def test_bulk_save_parity(backends):
+    rows = [('ali kaya', '05000000000'), ('yeni kişi', '05000000001')]
+    same(backends, lambda store: store.bulk_save(rows))
+    same(backends, lambda store: store.bulk_save(rows, upsert=True))
+    same(backends, lambda store: store.get('ali kaya'))
+    for store in backends:
+        with pytest.raises(DuplicateName):
+            store.save('ali kaya', '05000000002')
+
+
+def test_iter_rows_parity(backends):
+    rows = same(backends, lambda store: list(store.iter_rows()))
+    assert len(rows) == len(PEOPLE)
+    later = same(backends, lambda store: list(store.iter_rows(rows[2][0])))
+    assert later == rows[3:]
+
+
+def test_write_parity(backends):
+    same(backends, lambda store: store.update('ali kaya', '05321111111'))
+    same(backends, lambda store: store.delete('axb test'))
+    same(backends, lambda store: store.delete('axb test'))
+    same(backends, lambda store: store.search('test', 10))
+    assert names(same(backends, lambda store: store.search_number('05321111111', 10))) == ['ali kaya']
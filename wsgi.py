@@ -0,0 +1,12 @@
+"""
+Production WSGI entry point for the Phonebook App
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import importlib
+
+# The application module name contains dashes, so it is loaded by name
+phonebook_app = importlib.import_module('phonebook-app-secure')
+
+app = phonebook_app.create_app()